@@ -0,0 +1,367 @@
+"""
+Benchmarks the Lambda entry point (app.main.handler) with synthetic API
+Gateway v2 events carrying fake Twilio webhooks. Vendors (Sarvam, Gemini,
+Supabase, Twilio recordings) are replaced with in-process fakes that answer
+after a configurable delay, so the numbers show our own overhead plus the
+latency you dial in:
+
+    python scripts/benchmark_handler.py
+    python scripts/benchmark_handler.py --cold-runs 10 --calls 200 --latency-ms 0
+    python scripts/benchmark_handler.py --latency stt=400 llm=600 tts=250
+
+Each cold run is a fresh interpreter that imports the app and handles one
+call; init time is measured from process spawn to handler ready. The warm run
+reuses one interpreter for --calls calls. Every call is the same webhook
+sequence: welcome, PIN, one recorded turn, status callback.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+VENDORS = ["stt", "translate", "tts", "llm", "db", "download"]
+STEPS = ["welcome", "pin", "turn", "status"]
+
+# --- Child process: fakes, events and the invocation loop ---
+
+def install_fakes(latency: dict):
+    """
+    Registers fake vendor clients in place of the real ones. Must run after
+    app.main is imported (modules register their real factories on import)
+    and before the first request (clients are only built on first use).
+    """
+    import asyncio
+    import base64
+    import httpx
+    from types import SimpleNamespace
+    from app.services import registry
+    from app.utils.audio import pcm16_to_wav, pcm16_to_mulaw
+    from array import array
+    import math
+
+    async def wait(vendor: str):
+        await asyncio.sleep(latency[vendor] / 1000)
+
+    def tone(seconds: float, sample_rate: int = 8000) -> bytes:
+        # Syllable-like bursts, so the recording passes the VAD
+        return array('h', [
+            int(8000 * math.sin(2 * math.pi * 180 * i / sample_rate) * (0.5 + 0.5 * math.sin(2 * math.pi * 4 * i / sample_rate)))
+            for i in range(int(seconds * sample_rate))
+        ]).tobytes()
+
+    recording = pcm16_to_wav(tone(3.0), 8000)
+    speech_pcm = tone(0.5)
+
+    class SpeechToText:
+        async def transcribe(self, file, model):
+            await wait("stt")
+            return SimpleNamespace(transcript="I would like to know my account balance", language_code="hi-IN")
+
+    class Text:
+        async def translate(self, input, source_language_code, target_language_code, speaker_gender):
+            await wait("translate")
+            return SimpleNamespace(translated_text=input)
+
+    class TTSSocket:
+        def __init__(self):
+            self.codec = "linear16"
+
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc):
+            return False
+
+        async def configure(self, target_language_code, speaker, speech_sample_rate, output_audio_codec):
+            self.codec = output_audio_codec
+
+        async def convert(self, text):
+            pass
+
+        async def flush(self):
+            await wait("tts")
+
+        async def __aiter__(self):
+            audio = pcm16_to_mulaw(speech_pcm) if self.codec == "mulaw" else speech_pcm
+            yield SimpleNamespace(type="audio", data=SimpleNamespace(audio=base64.b64encode(audio).decode()))
+            yield SimpleNamespace(type="event", data=SimpleNamespace(event_type="final"))
+
+    class TextToSpeech:
+        async def convert(self, text, target_language_code, model, **options):
+            await wait("tts")
+            return SimpleNamespace(audios=[base64.b64encode(pcm16_to_wav(speech_pcm, 8000)).decode()])
+
+    class TTSStreaming:
+        def connect(self, **kwargs):
+            return TTSSocket()
+
+    class FakeSarvam:
+        speech_to_text = SpeechToText()
+        text = Text()
+        text_to_speech = TextToSpeech()
+        text_to_speech_streaming = TTSStreaming()
+
+    replies = iter(range(10 ** 9))
+
+    class Response:
+        def __init__(self, text: str):
+            self.text = text
+
+        async def __aiter__(self):
+            # Two sentences, so translation and TTS overlap generation
+            for part in self.text.split("|"):
+                yield SimpleNamespace(text=part)
+
+    class ChatSession:
+        def __init__(self, history):
+            self.history = list(history)
+
+        async def send_message_async(self, prompt, stream=False, request_options=None):
+            await wait("llm")
+            # A distinct reply per turn, so TTS isn't served from the cache
+            text = f"Your balance is {next(replies)} rupees as of today. |Is there anything else I can help with?"
+            self.history += [{"role": "user", "parts": [prompt]}, {"role": "model", "parts": [text.replace("|", "")]}]
+            return Response(text)
+
+    class GenerativeModel:
+        def __init__(self, model_name, system_instruction=None):
+            pass
+
+        def start_chat(self, history=None):
+            return ChatSession(history or [])
+
+        async def generate_content_async(self, prompt, stream=False, request_options=None):
+            return await ChatSession([]).send_message_async(prompt)
+
+        async def count_tokens_async(self, contents):
+            await wait("llm")
+
+    class Query:
+        def __getattr__(self, name):
+            # select / eq / limit return the query itself
+            return lambda *args, **kwargs: self
+
+        async def execute(self):
+            await wait("db")
+            return SimpleNamespace(data=[{"id": 1, "full_name": "Test Caller", "pin": "1234"}])
+
+    class FakeSupabase:
+        def table(self, name):
+            return Query()
+
+    async def twilio_api(request: httpx.Request) -> httpx.Response:
+        await wait("download")
+        return httpx.Response(200, content=recording if request.method == "GET" else b"")
+
+    registry.register("sarvam", FakeSarvam)
+    registry.register("sarvam_http", lambda: httpx.AsyncClient(transport=httpx.MockTransport(twilio_api)))
+    registry.register("twilio_http", lambda: httpx.AsyncClient(transport=httpx.MockTransport(twilio_api)))
+    registry.register("gemini", lambda: SimpleNamespace(GenerativeModel=GenerativeModel))
+
+    async def build_supabase():
+        return FakeSupabase()
+    registry.register("supabase", build_supabase)
+
+def api_gateway_event(method: str, path: str, form: dict | None = None) -> dict:
+    """
+    Builds an API Gateway HTTP API (payload v2.0) event, as Lambda receives
+    it for a Twilio webhook.
+    """
+    from urllib.parse import urlencode
+    path, _, query = path.partition("?")
+    host = "bench.execute-api.ap-south-1.amazonaws.com"
+    headers = {"host": host, "user-agent": "TwilioProxy/1.1", "x-forwarded-proto": "https"}
+    body = ""
+    if form is not None:
+        headers["content-type"] = "application/x-www-form-urlencoded"
+        body = urlencode(form)
+    return {
+        "version": "2.0",
+        "routeKey": "$default",
+        "rawPath": path,
+        "rawQueryString": query,
+        "headers": headers,
+        "requestContext": {
+            "accountId": "123456789012",
+            "apiId": "bench",
+            "domainName": host,
+            "domainPrefix": "bench",
+            "http": {"method": method, "path": path, "protocol": "HTTP/1.1", "sourceIp": "127.0.0.1", "userAgent": "TwilioProxy/1.1"},
+            "requestId": f"req-{time.monotonic_ns()}",
+            "routeKey": "$default",
+            "stage": "$default",
+            "time": time.strftime("%d/%b/%Y:%H:%M:%S +0000", time.gmtime()),
+            "timeEpoch": int(time.time() * 1000),
+        },
+        "body": body,
+        "isBase64Encoded": False,
+    }
+
+class LambdaContext:
+    function_name = "benchmark"
+    memory_limit_in_mb = 1024
+    aws_request_id = "benchmark"
+    invoked_function_arn = "arn:aws:lambda:ap-south-1:123456789012:function:benchmark"
+
+    def get_remaining_time_in_millis(self) -> int:
+        return 30000
+
+def call_events(call_sid: str) -> list[tuple[str, dict]]:
+    """
+    The webhooks Twilio sends for one short call.
+    """
+    base = {"CallSid": call_sid, "AccountSid": "AC" + "0" * 32, "From": "+919800000000", "To": "+918000000000"}
+    recording = f"https://api.twilio.com/2010-04-01/Accounts/AC/Recordings/RE{call_sid[2:]}"
+    return [
+        ("welcome", api_gateway_event("POST", "/twilio/voice", {**base, "CallStatus": "ringing"})),
+        ("pin", api_gateway_event("POST", "/twilio/voice", {**base, "CallStatus": "in-progress", "Digits": "1234"})),
+        ("turn", api_gateway_event("POST", "/twilio/voice", {**base, "CallStatus": "in-progress", "RecordingUrl": recording, "RecordingDuration": "3"})),
+        ("status", api_gateway_event("POST", "/twilio/status", {**base, "CallStatus": "completed"})),
+    ]
+
+def follow_redirects(handler, response: dict, form: dict, context) -> dict:
+    """
+    Follows TwiML <Redirect>s (IMMEDIATE_ACK polling) the way Twilio would,
+    returning the final response.
+    """
+    import re
+    while response["statusCode"] < 400:
+        match = re.search(r"<Redirect[^>]*>([^<]+)</Redirect>", response.get("body", ""))
+        if not match:
+            break
+        response = handler(api_gateway_event("POST", match.group(1).replace("&amp;", "&"), form), context)
+    return response
+
+def run_calls(handler, count: int, prefix: str) -> dict:
+    """
+    Invokes the handler for `count` calls; returns latencies (ms) per step,
+    including any polls the step redirects to.
+    """
+    timings = {step: [] for step in STEPS}
+    context = LambdaContext()
+    for n in range(count):
+        for step, event in call_events(f"CA{prefix}{n:08d}"):
+            started = time.perf_counter()
+            response = handler(event, context)
+            response = follow_redirects(handler, response, {"CallSid": f"CA{prefix}{n:08d}"}, context)
+            timings[step].append((time.perf_counter() - started) * 1000)
+            if response["statusCode"] >= 400:
+                raise RuntimeError(f"{step} returned {response['statusCode']}: {response.get('body', '')[:500]}")
+    return timings
+
+def child(calls: int, latency: dict, app_dir: str = SRC):
+    import resource
+    # Lambda defaults (e.g. no progressive playback) and a private TTS cache
+    os.environ.setdefault("AWS_LAMBDA_FUNCTION_NAME", "benchmark")
+    os.environ["TTS_CACHE_DIR"] = tempfile.mkdtemp(prefix="tts-bench-")
+    sys.path.insert(0, app_dir)
+
+    started = time.perf_counter()
+    from app.main import handler
+    import_ms = (time.perf_counter() - started) * 1000
+    install_fakes(latency)
+    ready_at = time.time()
+
+    first = run_calls(handler, 1, "cold")
+    warm = run_calls(handler, calls, "warm") if calls else {}
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({
+        "ready_at": ready_at,
+        "import_ms": import_ms,
+        "first": first,
+        "warm": warm,
+        # ru_maxrss is KiB on Linux, bytes on macOS
+        "peak_rss_mb": peak_rss / (1024 * 1024 if sys.platform == "darwin" else 1024),
+    }))
+
+# --- Parent process: runs children and reports ---
+
+def spawn(calls: int, latency: dict, app_dir: str = SRC, isolated: bool = False) -> dict:
+    """
+    Runs one child interpreter against the app (and its dependencies) in
+    `app_dir`. `isolated` hides site-packages and disables bytecode writes,
+    as on Lambda, so only the bundle in `app_dir` is used.
+    """
+    command = [sys.executable]
+    env = dict(os.environ)
+    if isolated:
+        command.append("-S")
+        env["PYTHONDONTWRITEBYTECODE"] = "1"
+        env.pop("PYTHONPATH", None)
+    command += [os.path.abspath(__file__), "--child", "--calls", str(calls), "--latency-json", json.dumps(latency), "--app-dir", app_dir]
+    spawned_at = time.time()
+    result = subprocess.run(command, capture_output=True, text=True, env=env)
+    if result.returncode != 0:
+        sys.exit(f"Benchmark run failed:\n{result.stdout[-2000:]}\n{result.stderr[-4000:]}")
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    report["init_ms"] = (report["ready_at"] - spawned_at) * 1000
+    return report
+
+def percentile(values: list[float], p: float) -> float:
+    ordered = sorted(values)
+    index = (len(ordered) - 1) * p / 100
+    low = int(index)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (index - low)
+
+def print_table(title: str, rows: dict):
+    print(f"\n{title}")
+    print(f"{'':<16} {'n':>5} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}")
+    for name, values in rows.items():
+        if not values:
+            continue
+        print(
+            f"{name:<16} {len(values):>5} {percentile(values, 50):>9.1f} {percentile(values, 95):>9.1f}"
+            f" {percentile(values, 99):>9.1f} {max(values):>9.1f}"
+        )
+
+def main(cold_runs: int, calls: int, latency: dict, app_dir: str = SRC, isolated: bool = False):
+    print("Vendor latency (ms): " + ", ".join(f"{vendor}={ms:g}" for vendor, ms in latency.items()))
+
+    cold = [spawn(0, latency, app_dir, isolated) for _ in range(cold_runs)]
+    if cold:
+        print_table("Cold start (ms, one fresh interpreter per run)", {
+            "init": [run["init_ms"] for run in cold],
+            "import app.main": [run["import_ms"] for run in cold],
+            **{f"first {step}": [run["first"][step][0] for run in cold] for step in STEPS},
+        })
+        print(f"{'peak RSS (MB)':<16} {max(run['peak_rss_mb'] for run in cold):>15.1f}")
+
+    if calls:
+        warm = spawn(calls, latency, app_dir, isolated)
+        print_table(f"Warm invocations (ms, {calls} calls in one interpreter)", warm["warm"])
+        print(f"{'peak RSS (MB)':<16} {warm['peak_rss_mb']:>15.1f}")
+
+def parse_latency(default_ms: float, overrides: list[str]) -> dict:
+    latency = {vendor: default_ms for vendor in VENDORS}
+    for item in overrides:
+        vendor, _, ms = item.partition("=")
+        if vendor not in latency:
+            sys.exit(f"Unknown vendor {vendor!r}; choose from {', '.join(VENDORS)}")
+        latency[vendor] = float(ms)
+    return latency
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cold-start and warm-invoke benchmark for app.main.handler")
+    parser.add_argument("--cold-runs", type=int, default=5, help="Fresh interpreters to start (0 to skip)")
+    parser.add_argument("--calls", type=int, default=50, help="Calls in the warm run (0 to skip)")
+    parser.add_argument("--latency-ms", type=float, default=50, help="Latency of every fake vendor call")
+    parser.add_argument("--latency", nargs="*", default=[], metavar="VENDOR=MS",
+                        help=f"Per-vendor latency; vendors: {', '.join(VENDORS)}")
+    parser.add_argument("--app-dir", default=SRC,
+                        help="Directory holding the app package (e.g. a Lambda build with its dependencies)")
+    parser.add_argument("--isolated", action="store_true",
+                        help="Ignore site-packages and don't write bytecode, as on Lambda")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--latency-json", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.calls, json.loads(args.latency_json), os.path.abspath(args.app_dir))
+    else:
+        main(args.cold_runs, args.calls, parse_latency(args.latency_ms, args.latency), os.path.abspath(args.app_dir), args.isolated)
@@ -0,0 +1,31 @@
+"""
+Pre-renders the fixed IVR prompts (PIN prompt, greeting, errors) in every
+supported language into src/app/static/prompts. Run before packaging:
+
+    python scripts/build_prompt_bank.py
+    python scripts/build_prompt_bank.py --languages hi-IN kn-IN --force
+"""
+import argparse
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from app.services.prompt_bank import build_prompt_bank, SUPPORTED_LANGUAGES
+from app.services import registry
+
+async def main(languages, force):
+    try:
+        manifest = await build_prompt_bank(languages, force=force)
+    finally:
+        await registry.close_all()
+    total = sum(len(phrases) for phrases in manifest.values())
+    print(f"Prompt bank ready: {total} clips in {len(manifest)} languages")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the pre-rendered IVR prompt bank")
+    parser.add_argument("--languages", nargs="+", default=SUPPORTED_LANGUAGES)
+    parser.add_argument("--force", action="store_true", help="Re-render every clip")
+    args = parser.parse_args()
+    asyncio.run(main(args.languages, args.force))
@@ -0,0 +1,347 @@
+"""
+Builds a slimmed copy of the Lambda bundle (`sam build` output) with only
+the dependencies a representative call imports, then precompiles it:
+
+    sam build
+    python scripts/build_slim_lambda.py
+    python scripts/build_slim_lambda.py --build-dir .aws-sam/build/VoiceAIFunction --keep websockets
+
+Steps:
+1. Trace: a fresh interpreter (site-packages hidden) imports app.main from
+   the bundle, builds every vendor client for real (which imports the SDKs)
+   and runs one benchmark call. Every top-level package it loads is kept, as
+   are the packages listed in requirements.txt and --keep.
+2. Prune: untraced packages (and their dist-info), console scripts,
+   __pycache__, tests, type stubs and C sources. Kept dist-info directories
+   keep METADATA and entry_points.txt (sarvamai reads its own version through
+   importlib.metadata).
+3. Precompile: bytecode is written into the bundle, since /var/task is
+   read-only on Lambda and every cold start would otherwise recompile.
+4. Report: size and zipped size of both bundles, and cold-start numbers from
+   scripts/benchmark_handler.py for each.
+
+Run it with the same Python version as the Lambda runtime; bytecode from
+another version is ignored.
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import zipfile
+
+SCRIPTS = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(SCRIPTS)
+REQUIREMENTS = os.path.join(ROOT, "src", "requirements.txt")
+
+# dist-info files read at runtime
+DIST_INFO_KEEP = {"METADATA", "entry_points.txt"}
+# Directories and file types that are never needed at runtime
+JUNK_DIRS = {"__pycache__", "tests", "test"}
+JUNK_SUFFIXES = (".pyi", ".pyx", ".pxd", ".c", ".h", ".cpp")
+# Kept packages whose untraced subpackages are pruned too: we only use
+# twilio.twiml (not the REST client), and google.generativeai only needs
+# googleapiclient's discovery module
+DEEP_PRUNE = ["twilio", "googleapiclient"]
+# Data that isn't read on any path we use (static discovery documents for
+# every Google API)
+DATA_PRUNE = [os.path.join("googleapiclient", "discovery_cache", "documents")]
+
+# --- Trace (runs in the bundle's own interpreter) ---
+
+def trace_child(bundle: str):
+    """
+    Imports and exercises the app from `bundle`; prints the files of every
+    module loaded.
+    """
+    sys.path.insert(0, bundle)
+    sys.path.insert(1, SCRIPTS)
+    # Placeholder credentials, so clients can be constructed (nothing is sent)
+    for name, value in {
+        "SARVAM_API_KEY": "trace",
+        "GEMINI_API_KEY": "trace",
+        "SUPABASE_URL": "https://trace.supabase.co",
+        "SUPABASE_KEY": "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoiYW5vbiJ9.dHJhY2U",
+        "AWS_LAMBDA_FUNCTION_NAME": "trace",
+        "TTS_CACHE_DIR": tempfile.mkdtemp(prefix="tts-trace-"),
+    }.items():
+        os.environ.setdefault(name, value)
+
+    import benchmark_handler as bench
+    from app.main import handler
+    from app.services import registry
+
+    async def build_clients():
+        for name in registry.registered():
+            await registry.aget(name)
+        await registry.close_all()
+
+    # Mangum reuses the thread's event loop, so keep one set
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    loop.run_until_complete(build_clients())
+
+    bench.install_fakes({vendor: 0 for vendor in bench.VENDORS})
+    bench.run_calls(handler, 1, "trace")
+
+    files = set()
+    for module in list(sys.modules.values()):
+        for path in [getattr(module, "__file__", None), *(getattr(module, "__path__", None) or [])]:
+            if path:
+                files.add(os.path.abspath(path))
+    print(json.dumps(sorted(files)))
+
+def trace(bundle: str) -> list[str]:
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    env.pop("PYTHONPATH", None)
+    result = subprocess.run(
+        [sys.executable, "-S", os.path.abspath(__file__), "--trace-child", bundle],
+        capture_output=True,
+        text=True,
+        env=env,
+    )
+    if result.returncode != 0:
+        sys.exit(f"Trace failed:\n{result.stdout[-2000:]}\n{result.stderr[-4000:]}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+# --- Bundle layout ---
+
+def is_namespace(path: str) -> bool:
+    return os.path.isdir(path) and not os.path.exists(os.path.join(path, "__init__.py"))
+
+def units(bundle: str) -> list[str]:
+    """
+    Prunable units of the bundle, relative to it: top-level packages and
+    modules, or the subpackages of namespace packages such as google/.
+    """
+    found = []
+    for entry in sorted(os.listdir(bundle)):
+        path = os.path.join(bundle, entry)
+        if entry.endswith(".dist-info"):
+            continue
+        if is_namespace(path) and not entry.endswith(".libs") and entry != "bin":
+            found += [os.path.join(entry, child) for child in sorted(os.listdir(path))]
+        else:
+            found.append(entry)
+    return found
+
+def unit_of(bundle: str, relative: str) -> str:
+    parts = relative.split(os.sep)
+    if len(parts) > 1 and is_namespace(os.path.join(bundle, parts[0])):
+        return os.path.join(parts[0], parts[1])
+    return parts[0]
+
+def distributions(bundle: str) -> dict:
+    """
+    dist-info directory -> units it installed (from its RECORD).
+    """
+    owned = {}
+    for entry in os.listdir(bundle):
+        if not entry.endswith(".dist-info"):
+            continue
+        installed = set()
+        record = os.path.join(bundle, entry, "RECORD")
+        if os.path.exists(record):
+            with open(record, encoding="utf-8") as f:
+                for line in f:
+                    path = line.rsplit(",", 2)[0].replace("/", os.sep)
+                    if path and not path.startswith("..") and ".dist-info" not in path.split(os.sep)[0]:
+                        installed.add(unit_of(bundle, path))
+        owned[entry] = installed
+    return owned
+
+def required_distributions() -> set[str]:
+    names = set()
+    if os.path.exists(REQUIREMENTS):
+        with open(REQUIREMENTS, encoding="utf-8") as f:
+            for line in f:
+                name = line.split("#")[0].strip()
+                for separator in "=<>~[; ":
+                    name = name.split(separator)[0]
+                if name:
+                    names.add(normalize(name))
+    return names
+
+def normalize(name: str) -> str:
+    return name.lower().replace("-", "_").replace(".", "_")
+
+def dist_name(dist_info: str) -> str:
+    return normalize(dist_info[:-len(".dist-info")].rsplit("-", 1)[0])
+
+# --- Prune ---
+
+def remove(path: str):
+    if os.path.isdir(path) and not os.path.islink(path):
+        shutil.rmtree(path)
+    else:
+        os.remove(path)
+
+def prune_subpackages(bundle: str, package: str, loaded: list[str]) -> list[str]:
+    """
+    Removes the subpackages of `package` that no traced module lives in.
+    """
+    root = os.path.join(bundle, package)
+    if not os.path.isdir(root):
+        return []
+    removed = []
+    for entry in sorted(os.listdir(root)):
+        path = os.path.join(root, entry)
+        if not os.path.exists(os.path.join(path, "__init__.py")):
+            continue
+        if not any(module == path or module.startswith(path + os.sep) for module in loaded):
+            shutil.rmtree(path)
+            removed.append(os.path.join(package, entry))
+    return removed
+
+def prune(bundle: str, loaded: list[str], keep: set[str], deep: list[str] = DEEP_PRUNE) -> list[str]:
+    """
+    Removes everything the trace didn't load from `bundle`. Returns the
+    removed packages.
+    """
+    traced = set()
+    for path in loaded:
+        if path.startswith(bundle + os.sep):
+            traced.add(unit_of(bundle, os.path.relpath(path, bundle)))
+
+    owned = distributions(bundle)
+    required = required_distributions()
+    kept = set(traced) | {unit for unit in units(bundle) if unit.split(os.sep)[-1].split(".")[0] in keep}
+    for dist_info, installed in owned.items():
+        if dist_name(dist_info) in required or dist_name(dist_info) in keep:
+            kept |= installed
+    # Shared libraries vendored next to a package (auditwheel's name.libs)
+    kept |= {unit for unit in units(bundle) if unit.endswith(".libs") and unit[:-len(".libs")] in kept}
+
+    removed = []
+    for unit in units(bundle):
+        if unit not in kept:
+            remove(os.path.join(bundle, unit))
+            removed.append(unit)
+    for package in deep:
+        if package not in keep:
+            removed += prune_subpackages(bundle, package, loaded)
+    for data in DATA_PRUNE:
+        path = os.path.join(bundle, data)
+        if os.path.exists(path) and not any(module.startswith(path + os.sep) for module in loaded):
+            shutil.rmtree(path)
+            removed.append(data)
+
+    for dist_info, installed in owned.items():
+        path = os.path.join(bundle, dist_info)
+        if installed and not installed & kept:
+            remove(path)
+            continue
+        for root, dirs, files in os.walk(path, topdown=False):
+            for name in files:
+                if name not in DIST_INFO_KEEP:
+                    os.remove(os.path.join(root, name))
+            for name in dirs:
+                if not os.listdir(os.path.join(root, name)):
+                    os.rmdir(os.path.join(root, name))
+
+    # Junk inside what's left; test packages the trace imported are kept
+    loaded_dirs = {os.path.dirname(path) for path in loaded} | set(loaded)
+    for root, dirs, files in os.walk(bundle):
+        for name in list(dirs):
+            path = os.path.join(root, name)
+            if name in JUNK_DIRS and path not in loaded_dirs:
+                shutil.rmtree(path)
+                dirs.remove(name)
+        for name in files:
+            if name.endswith(JUNK_SUFFIXES) or name.endswith((".pyc", ".pyo")):
+                os.remove(os.path.join(root, name))
+
+    # Emptied namespace packages
+    for entry in os.listdir(bundle):
+        path = os.path.join(bundle, entry)
+        if os.path.isdir(path) and not os.listdir(path):
+            os.rmdir(path)
+    return removed
+
+def precompile(bundle: str):
+    subprocess.run([sys.executable, "-m", "compileall", "-q", "-j", "0", bundle], check=True)
+
+# --- Report ---
+
+def disk_size(path: str) -> tuple[int, int]:
+    total = count = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            total += os.path.getsize(os.path.join(root, name))
+            count += 1
+    return total, count
+
+def zipped_size(path: str) -> int:
+    with tempfile.TemporaryDirectory() as scratch:
+        archive = os.path.join(scratch, "function.zip")
+        with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as zf:
+            for root, _, files in os.walk(path):
+                for name in files:
+                    full = os.path.join(root, name)
+                    zf.write(full, os.path.relpath(full, path))
+        return os.path.getsize(archive)
+
+def cold_start(bundle: str, runs: int) -> dict:
+    sys.path.insert(0, SCRIPTS)
+    import benchmark_handler as bench
+    latency = {vendor: 0 for vendor in bench.VENDORS}
+    reports = [bench.spawn(0, latency, bundle, isolated=True) for _ in range(runs)]
+    return {
+        "init": bench.percentile([r["init_ms"] for r in reports], 50),
+        "import": bench.percentile([r["import_ms"] for r in reports], 50),
+        "first turn": bench.percentile([r["first"]["turn"][0] for r in reports], 50),
+        "peak RSS": max(r["peak_rss_mb"] for r in reports),
+    }
+
+def report(original: str, slim: str, runs: int):
+    rows = []
+    for label, path in [("original", original), ("slim", slim)]:
+        size, count = disk_size(path)
+        rows.append((label, size, count, zipped_size(path), cold_start(path, runs) if runs else None))
+
+    print(f"\n{'':<10} {'files':>8} {'size MB':>9} {'zip MB':>8}", end="")
+    print(f" {'init ms':>9} {'import ms':>10} {'turn ms':>8} {'RSS MB':>7}" if runs else "")
+    for label, size, count, zipped, cold in rows:
+        print(f"{label:<10} {count:>8} {size / 1e6:>9.1f} {zipped / 1e6:>8.1f}", end="")
+        if cold:
+            print(f" {cold['init']:>9.0f} {cold['import']:>10.0f} {cold['first turn']:>8.0f} {cold['peak RSS']:>7.1f}")
+        else:
+            print()
+    if runs:
+        print(f"\nCold start: p50 of {runs} fresh interpreters each, vendors stubbed with no latency, "
+              "bytecode writes disabled as on Lambda.")
+
+def main(build_dir: str, out_dir: str, keep: set[str], runs: int):
+    if not os.path.exists(os.path.join(build_dir, "app", "main.py")):
+        sys.exit(f"{build_dir} is not a Lambda build (no app/main.py); run `sam build` first")
+    if os.path.exists(out_dir):
+        shutil.rmtree(out_dir)
+    shutil.copytree(build_dir, out_dir, ignore=shutil.ignore_patterns("__pycache__"))
+
+    print(f"Tracing imports in {out_dir}")
+    loaded = trace(out_dir)
+    removed = prune(out_dir, loaded, keep)
+    print(f"Pruned {len(removed)} packages: {', '.join(sorted(removed))}")
+
+    # Prove the slim bundle still serves a call before reporting on it
+    trace(out_dir)
+    precompile(out_dir)
+    report(build_dir, out_dir, runs)
+    print(f"\nSlim bundle: {out_dir}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build a pruned, precompiled Lambda bundle")
+    parser.add_argument("--build-dir", default=os.path.join(ROOT, ".aws-sam", "build", "VoiceAIFunction"))
+    parser.add_argument("--out-dir", default=os.path.join(ROOT, ".aws-sam", "slim", "VoiceAIFunction"))
+    parser.add_argument("--keep", nargs="*", default=[], help="Extra top-level packages or distributions to keep")
+    parser.add_argument("--cold-runs", type=int, default=5, help="Cold starts to measure per bundle (0 to skip)")
+    parser.add_argument("--trace-child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.trace_child:
+        trace_child(args.trace_child)
+    else:
+        main(os.path.abspath(args.build_dir), os.path.abspath(args.out_dir), {normalize(k) for k in args.keep}, args.cold_runs)
@@ -0,0 +1,72 @@
+"""
+Reports where import time goes when the app is loaded (the Lambda init
+phase), using `python -X importtime`:
+
+    python scripts/import_report.py
+    python scripts/import_report.py --module app.routers.voice --top 30
+
+Packages are ranked by cumulative import time; pass --by module for
+individual modules. Vendor SDKs built lazily through app.services.registry
+should not appear unless something imports them eagerly.
+"""
+import argparse
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+def measure(module: str) -> list[tuple[str, int, int, int]]:
+    """
+    Imports `module` in a fresh interpreter and returns
+    (name, depth, self_us, cumulative_us) for every module it loaded.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=SRC,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        sys.exit(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), depth, int(self_us), int(cumulative_us)))
+    return rows
+
+def by_package(rows) -> dict:
+    # Self time summed per top-level package
+    totals = defaultdict(int)
+    for name, _, self_us, _ in rows:
+        totals[name.split(".")[0]] += self_us
+    return totals
+
+def main(module: str, top: int, by: str):
+    rows = measure(module)
+    total_us = sum(self_us for _, _, self_us, _ in rows)
+    print(f"import {module}: {total_us / 1000:.1f} ms across {len(rows)} modules\n")
+
+    if by == "package":
+        ranked = sorted(by_package(rows).items(), key=lambda item: item[1], reverse=True)
+        print(f"{'package':<40} {'ms':>8} {'share':>7}")
+        for name, self_us in ranked[:top]:
+            print(f"{name:<40} {self_us / 1000:>8.1f} {self_us / total_us:>7.1%}")
+    else:
+        ranked = sorted(rows, key=lambda row: row[3], reverse=True)
+        print(f"{'module':<50} {'self ms':>8} {'cum ms':>8}")
+        for name, _, self_us, cumulative_us in ranked[:top]:
+            print(f"{name:<50} {self_us / 1000:>8.1f} {cumulative_us / 1000:>8.1f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report import time of the app by package or module")
+    parser.add_argument("--module", default="app.main", help="Module to import (default: app.main)")
+    parser.add_argument("--top", type=int, default=20, help="Rows to show")
+    parser.add_argument("--by", choices=["package", "module"], default="package")
+    args = parser.parse_args()
+    main(args.module, args.top, args.by)
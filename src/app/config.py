@@ -14,6 +14,121 @@ SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 # Configuration
 # User requested "gemini 2.5 flash"
 GEMINI_MODEL = "gemini-2.5-flash" 
+# Optional system instruction applied to every conversation
+GEMINI_SYSTEM_PROMPT = os.getenv("GEMINI_SYSTEM_PROMPT") or None
+# Per-call Gemini timeout (seconds)
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "10"))
+# Cache GEMINI_SYSTEM_PROMPT server-side (Gemini context caching); needs a prompt
+# above the model's minimum cacheable size, otherwise the plain model is used
+GEMINI_CONTEXT_CACHE = os.getenv("GEMINI_CONTEXT_CACHE", "false").lower() == "true"
+GEMINI_CACHE_TTL = float(os.getenv("GEMINI_CACHE_TTL", "3600"))
+# Conversation history sent to Gemini: the last HISTORY_MAX_TURNS exchanges,
+# within HISTORY_TOKEN_BUDGET (estimated); older turns are folded into a summary
+HISTORY_MAX_TURNS = int(os.getenv("HISTORY_MAX_TURNS", "6"))
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", "1500"))
+
+# Sarvam HTTP pool (shared by STT, translation and TTS)
+SARVAM_MAX_CONNECTIONS = int(os.getenv("SARVAM_MAX_CONNECTIONS", "100"))
+SARVAM_MAX_KEEPALIVE = int(os.getenv("SARVAM_MAX_KEEPALIVE", "20"))
+SARVAM_KEEPALIVE_EXPIRY = float(os.getenv("SARVAM_KEEPALIVE_EXPIRY", "60"))
+SARVAM_TIMEOUT = float(os.getenv("SARVAM_TIMEOUT", "30"))
+
+# Twilio recording downloads
+RECORDING_MAX_CONNECTIONS = int(os.getenv("RECORDING_MAX_CONNECTIONS", "50"))
+RECORDING_MAX_PER_HOST = int(os.getenv("RECORDING_MAX_PER_HOST", "20"))
+RECORDING_TIMEOUT = float(os.getenv("RECORDING_TIMEOUT", "10"))
+# Twilio returns 404 until the recording is ready; retry with backoff
+RECORDING_RETRIES = int(os.getenv("RECORDING_RETRIES", "4"))
+RECORDING_RETRY_BACKOFF = float(os.getenv("RECORDING_RETRY_BACKOFF", "0.25"))
+
+# Twilio Media Streams (real-time duplex audio over /twilio/stream)
+MEDIA_STREAMS_ENABLED = os.getenv("MEDIA_STREAMS_ENABLED", "false").lower() == "true"
+# Streaming STT: "unknown" lets Saarika detect the language per utterance
+STT_STREAMING_LANGUAGE = os.getenv("STT_STREAMING_LANGUAGE", "unknown")
+# How long to wait for the final transcript after a VAD end-of-speech flush
+STT_FLUSH_TIMEOUT = float(os.getenv("STT_FLUSH_TIMEOUT", "1.0"))
+# The synchronous STT API takes ~30 s of audio; longer recordings are cut at
+# pauses into overlapping segments and transcribed concurrently
+STT_MAX_SECONDS = float(os.getenv("STT_MAX_SECONDS", "25"))
+STT_CHUNK_OVERLAP = float(os.getenv("STT_CHUNK_OVERLAP", "0.5"))
+
+# Progressive playback: answer the webhook immediately and let /twilio/audio
+# stream the reply while it is synthesized. Lambda buffers responses and
+# freezes after returning, so it defaults to off there.
+ON_LAMBDA = bool(os.getenv("AWS_LAMBDA_FUNCTION_NAME"))
+PROGRESSIVE_PLAYBACK = os.getenv("PROGRESSIVE_PLAYBACK", "false" if ON_LAMBDA else "true").lower() == "true"
+# Reply audio format; the phone network carries 8 kHz μ-law, so anything
+# richer is only transcoded down by Twilio. "linear16" for 16-bit PCM
+PLAYBACK_CODEC = os.getenv("PLAYBACK_CODEC", "mulaw")
+PLAYBACK_SAMPLE_RATE = int(os.getenv("PLAYBACK_SAMPLE_RATE", "8000"))
+
+# Immediate ack: the webhook hands a recorded turn to a background task and
+# answers with a filler prompt plus a <Redirect> to /twilio/poll, which waits
+# up to POLL_TIMEOUT seconds (under Twilio's 15 s webhook limit) per request
+IMMEDIATE_ACK = os.getenv("IMMEDIATE_ACK", "false").lower() == "true"
+POLL_TIMEOUT = float(os.getenv("POLL_TIMEOUT", "10"))
+
+# Call state: "memory" (single process), "redis" or "dynamodb"
+CALL_STATE_BACKEND = os.getenv("CALL_STATE_BACKEND", "memory")
+CALL_STATE_TTL = float(os.getenv("CALL_STATE_TTL", "3600"))
+CALL_STATE_MAX_CALLS = int(os.getenv("CALL_STATE_MAX_CALLS", "10000"))
+CALL_STATE_LOCK_TIMEOUT = float(os.getenv("CALL_STATE_LOCK_TIMEOUT", "60"))
+# DynamoDB: times a conflicting write is re-applied to the latest state
+CALL_STATE_WRITE_RETRIES = int(os.getenv("CALL_STATE_WRITE_RETRIES", "3"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+CALL_STATE_TABLE = os.getenv("CALL_STATE_TABLE", "voice-ai-call-state")
+
+# Background sweeper for stale calls and reply audio
+SWEEP_INTERVAL = float(os.getenv("SWEEP_INTERVAL", "60"))
+AUDIO_IDLE_TTL = float(os.getenv("AUDIO_IDLE_TTL", "300"))
+
+# Local voice-activity check on recordings: trims silence before STT and
+# skips STT for clips with less than VAD_MIN_SPEECH_MS of speech
+VAD_ENABLED = os.getenv("VAD_ENABLED", "true").lower() == "true"
+VAD_MIN_SPEECH_MS = int(os.getenv("VAD_MIN_SPEECH_MS", "200"))
+
+# How telephony (8 kHz μ-law) TTS is produced: "remote" asks Bulbul for μ-law,
+# "local" requests 8 kHz PCM and encodes it here
+TTS_TELEPHONY_TRANSCODE = os.getenv("TTS_TELEPHONY_TRANSCODE", "remote")
+
+# TTS cache (memory LRU in front of a directory of clips)
+TTS_CACHE_ENABLED = os.getenv("TTS_CACHE_ENABLED", "true").lower() == "true"
+TTS_CACHE_MEMORY_BYTES = int(os.getenv("TTS_CACHE_MEMORY_BYTES", str(64 * 1024 * 1024)))
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", "/tmp/tts-cache") or None
+TTS_CACHE_DISK_BYTES = int(os.getenv("TTS_CACHE_DISK_BYTES", str(256 * 1024 * 1024)))
+
+# Translation cache
+TRANSLATION_CACHE_SIZE = int(os.getenv("TRANSLATION_CACHE_SIZE", "5000"))
+TRANSLATION_CACHE_TTL = float(os.getenv("TRANSLATION_CACHE_TTL", "86400"))
+# Optional JSON of frequent sentences loaded at startup (see warm_translation_cache)
+TRANSLATION_WARM_FILE = os.getenv("TRANSLATION_WARM_FILE") or None
+# Null entries translated at once while warming; kept well below
+# SARVAM_MAX_CONNECTIONS so the first calls after a cold start aren't starved
+TRANSLATION_WARM_CONCURRENCY = int(os.getenv("TRANSLATION_WARM_CONCURRENCY", "2"))
+
+# Language of pre-rendered IVR prompts before the caller's language is known
+IVR_LANGUAGE = os.getenv("IVR_LANGUAGE", "en-IN")
+
+# PIN authentication
+# Columns fetched from user_profiles (keep it to what the call flow uses)
+USER_PROFILE_COLUMNS = os.getenv("USER_PROFILE_COLUMNS", "id,full_name")
+# Column holding the caller's phone number (E.164, as Twilio sends `From`)
+USER_PHONE_COLUMN = os.getenv("USER_PHONE_COLUMN", "phone")
+# If set, PINs are looked up by HMAC-SHA256(PIN_PEPPER, pin) in this column
+PIN_HASH_COLUMN = os.getenv("PIN_HASH_COLUMN") or None
+PIN_PEPPER = os.getenv("PIN_PEPPER", "")
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", "10000"))
+AUTH_CACHE_TTL = float(os.getenv("AUTH_CACHE_TTL", "300"))
+AUTH_NEGATIVE_CACHE_TTL = float(os.getenv("AUTH_NEGATIVE_CACHE_TTL", "30"))
+
+# Caller-ID prefetch during the PIN <Gather>
+PREFETCH_ENABLED = os.getenv("PREFETCH_ENABLED", "true").lower() == "true"
+PREFETCH_TTL = float(os.getenv("PREFETCH_TTL", "120"))
+
+# Stage latency metrics: always served on /metrics; on Lambda they are also
+# printed as CloudWatch Embedded Metric Format (EMF) lines after each request
+METRICS_EMF = os.getenv("METRICS_EMF", "true" if ON_LAMBDA else "false").lower() == "true"
+METRICS_NAMESPACE = os.getenv("METRICS_NAMESPACE", "VoiceAI")
 
 # Audio Settings
 SAMPLE_RATE = 16000
@@ -1,16 +1,52 @@
+import asyncio
 from fastapi import FastAPI
-from app.routers import voice
-import uvicorn
-from fastapi import FastAPI
-from app.routers import voice
+from app.routers import voice, metrics
+from app.services import registry, sweeper
+from app.services.translator import warm_translation_cache
+from app.utils.timing import flush_emf
 from mangum import Mangum
 
 app = FastAPI()
 
 app.include_router(voice.router)
+app.include_router(metrics.router)
+
+_started = False
+
+def start_background_tasks():
+    global _started
+    if _started:
+        return
+    _started = True
+    # Evicts calls that ended without a status callback
+    sweeper.start_sweeper()
+    # Preload frequent translations without delaying startup
+    app.state.warmup = asyncio.create_task(warm_translation_cache())
+
+@app.on_event("startup")
+async def startup():
+    start_background_tasks()
+
+@app.middleware("http")
+async def start_on_first_request(request, call_next):
+    # Lambda runs without lifespan events (see handler below)
+    start_background_tasks()
+    try:
+        return await call_next(request)
+    finally:
+        # Print stage latencies as EMF before Lambda freezes the instance
+        flush_emf()
+
+@app.on_event("shutdown")
+async def shutdown():
+    sweeper.stop_sweeper()
+    flush_emf()
+    # Release pooled vendor connections (only clients that were built)
+    await registry.close_all()
 
-# Lambda handler
-handler = Mangum(app)
+# Lambda handler. Mangum would otherwise run startup and shutdown around every
+# invocation, closing the pooled vendor clients after each webhook.
+handler = Mangum(app, lifespan="off")
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,13 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.utils.metrics import render_prometheus
+
+router = APIRouter()
+
+@router.get("/metrics")
+async def metrics():
+    """
+    Prometheus scrape endpoint.
+    """
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
@@ -1,27 +1,64 @@
-from fastapi import APIRouter, Request, Response, HTTPException
-from fastapi.responses import StreamingResponse
-from twilio.twiml.voice_response import VoiceResponse, Play, Gather
-import requests
-import io
+from fastapi import APIRouter, Request, Response, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse, FileResponse
+from twilio.twiml.voice_response import VoiceResponse, Play, Gather, Connect
+import asyncio
+import uuid
 
+from app.config import (
+    MEDIA_STREAMS_ENABLED,
+    PROGRESSIVE_PLAYBACK,
+    PLAYBACK_SAMPLE_RATE,
+    PLAYBACK_CODEC,
+    VAD_ENABLED,
+    VAD_MIN_SPEECH_MS,
+    IMMEDIATE_ACK,
+    POLL_TIMEOUT,
+)
 from app.services.speech_to_text import speech_to_english
-from app.services.llm import run_llm
-from app.services.translator import translate_to_native
-from app.services.text_to_speech import synthesize_audio
+from app.services.conversation import speak_reply, resolve_language
+from app.services.history import store_summary
 from app.services.auth import verify_user_pin
-from app.utils.audio import get_content_type
+from app.services.recordings import download_recording
+from app.services.media_stream import MediaStreamSession
+from app.services.playback import AudioStream, render_to_stream, set_stream, get_stream
+from app.services.call_state import call_state
+from app.services import call_tasks
+from app.services.sweeper import end_call, TERMINAL_STATUSES
+from app.services.prompt_bank import play_prompt, prompt_path, load_manifest
+from app.services.prefetch import start_prefetch, verify_prefetched_pin, prefetched_greeting
+from app.utils.audio import get_content_type, trim_silence
+from app.utils.timing import Stage
 
 router = APIRouter()
 
-# In-memory storage for call context
+# Call context lives in the configured CallStateStore
 # Key: CallSid
 # Value: {
 #   "authenticated": bool,
 #   "user": dict,
-#   "history": list, # Gemini history format
-#   "audio_response": bytes # Last generated audio
+#   "history": list, # Gemini history format, recent turns only
+#   "summary": str, # Running summary of older turns
+#   "language": str, # Caller's language once detected
+#   "pending_turn": dict, # Recording handed to a background turn (IMMEDIATE_ACK)
+#   "turn_result": dict, # {"id", "twiml"} of the last background turn
 # }
-call_context = {}
+# The last generated audio is kept per process in app.services.playback.
+
+# Background turns (IMMEDIATE_ACK), per process
+# Key: CallSid, Value: (turn id, task resolving to the turn's TwiML)
+_turn_tasks = {}
+
+def listen(resp: VoiceResponse, request: Request, play_beep: bool = True):
+    """
+    Appends the verb that captures the caller's next utterance: a live
+    Media Stream when enabled, otherwise a <Record> turn.
+    """
+    if MEDIA_STREAMS_ENABLED:
+        connect = Connect()
+        connect.stream(url=f"wss://{request.url.netloc}/twilio/stream")
+        resp.append(connect)
+    else:
+        resp.record(action="/twilio/voice", play_beep=play_beep, timeout=2, max_length=60)
 
 @router.post("/twilio/voice")
 async def handle_voice_webhook(request: Request):
@@ -31,144 +68,425 @@ async def handle_voice_webhook(request: Request):
     try:
         form_data = await request.form()
         call_sid = form_data.get("CallSid")
-        digits = form_data.get("Digits") # PIN input
-        recording_url = form_data.get("RecordingUrl") # Audio input
         
-        # Initialize context if new call
-        if call_sid not in call_context:
-            call_context[call_sid] = {
-                "authenticated": False,
-                "user": None,
-                "history": [],
-                "audio_response": None
-            }
-            
-        context = call_context[call_sid]
+        # Load (or initialize) the call's context under its per-call lock;
+        # it is saved back when the turn completes
+        with Stage("webhook") as span:
+            async with call_state.update(call_sid) as context:
+                response = await handle_turn(request, form_data, call_sid, context)
+                span.language = context.get("language")
+                return response
+
+    except Exception as e:
+        import traceback
+        with open("error.log", "w") as f:
+            f.write(traceback.format_exc())
+            f.write(f"\nError: {e!r}")
+        print(f"Error: {e}")
         resp = VoiceResponse()
+        play_prompt(resp, request, "error")
+        return Response(content=str(resp), media_type="application/xml")
 
-        # --- Step 1: Authentication ---
-        if not context["authenticated"]:
-            if digits:
-                # Verify PIN
-                user = await verify_user_pin(digits)
-                if user:
-                    context["authenticated"] = True
-                    context["user"] = user
-                    greeting = f"Hello {user['full_name']}. How can I help you today?"
-                    resp.say(greeting)
-                    resp.record(action="/twilio/voice", play_beep=True, timeout=2, max_length=60)
+async def handle_turn(request: Request, form_data, call_sid: str, context: dict) -> Response:
+    """
+    Produces the TwiML for one webhook turn. Mutates `context` in place.
+    """
+    digits = form_data.get("Digits") # PIN input
+    recording_url = form_data.get("RecordingUrl") # Audio input
+    resp = VoiceResponse()
+
+    # --- Step 1: Authentication ---
+    if not context["authenticated"]:
+        if digits:
+            # Verify PIN, locally against the prefetched profile when we have one
+            user = await verify_prefetched_pin(call_sid, digits) or await verify_user_pin(digits)
+            if user:
+                context["authenticated"] = True
+                context["user"] = user
+                # Only if it was rendered for the user who just authenticated
+                greeting = prefetched_greeting(call_sid, user)
+                if greeting:
+                    clip_id = uuid.uuid4().hex[:12]
+                    await share_clip(call_sid, "greeting", clip_id, greeting)
+                    resp.play(f"/twilio/greeting/{call_sid}?clip={clip_id}")
                 else:
-                    resp.say("Invalid PIN. Please try again.")
-                    gather = Gather(num_digits=4, action="/twilio/voice")
-                    gather.say("Please enter your 4 digit PIN.")
-                    resp.append(gather)
+                    resp.say(f"Hello {user['full_name']}.")
+                    play_prompt(resp, request, "greeting")
+                listen(resp, request)
             else:
-                # Ask for PIN
+                play_prompt(resp, request, "invalid_pin")
                 gather = Gather(num_digits=4, action="/twilio/voice")
-                gather.say("Welcome. Please enter your 4 digit PIN.")
+                play_prompt(gather, request, "enter_pin")
                 resp.append(gather)
-            
-            return Response(content=str(resp), media_type="application/xml")
+        else:
+            # Look the caller up by number while they type their PIN
+            start_prefetch(call_sid, form_data.get("From"))
+            # Ask for PIN
+            gather = Gather(num_digits=4, action="/twilio/voice")
+            play_prompt(gather, request, "welcome")
+            resp.append(gather)
+        
+        return Response(content=str(resp), media_type="application/xml")
 
-        # --- Step 2: Conversation ---
+    # --- Step 2: Conversation ---
+    
+    # If we have a recording, process it
+    if recording_url:
+        # Check duration
+        duration = form_data.get("RecordingDuration")
+        print(f"Recording Duration: {duration}")
         
-        # If we have a recording, process it
-        if recording_url:
-            # Check duration
-            duration = form_data.get("RecordingDuration")
-            print(f"Recording Duration: {duration}")
-            
-            # If duration is missing or too short (e.g. < 1 second), it's likely silence/noise.
-            # Twilio might send '0' or '1'.
-            if duration and int(duration) <= 1:
-                print("Recording too short. Listening again...")
-                resp.record(action="/twilio/voice", play_beep=False, timeout=2, max_length=60)
-                return Response(content=str(resp), media_type="application/xml")
-
-            print(f"Downloading audio from: {recording_url}")
-            # 1. Download audio
-            from app.config import TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN
-            audio_response = requests.get(recording_url, auth=(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN))
-            
-            if audio_response.status_code != 200:
-                print(f"Failed to download audio: {audio_response.text}")
-                resp.say("Sorry, I could not hear you.")
-                return Response(content=str(resp), media_type="application/xml")
-                
-            audio_bytes = audio_response.content
-            
-            # 2. STT (English)
-            english_text, detected_lang = await speech_to_english(audio_bytes)
-            print(f"Transcript: {english_text}, Detected Lang: {detected_lang}")
-            
-            # If transcript is empty, listen again
-            if not english_text or not english_text.strip():
-                 print("Empty transcript. Listening again...")
-                 resp.record(action="/twilio/voice", play_beep=False, timeout=2, max_length=60)
-                 return Response(content=str(resp), media_type="application/xml")
-
-            # Update History (User)
-            context["history"].append({"role": "user", "parts": [english_text]})
-            
-            # 3. LLM (Reasoning) with History
-            llm_response = await run_llm(english_text, history=context["history"])
-            print(f"LLM Response: {llm_response}")
-            
-            # Update History (Model)
-            context["history"].append({"role": "model", "parts": [llm_response]})
-            
-            # 4. Translate (English -> Native)
-            target_lang = detected_lang
-            if not target_lang or target_lang == "unknown":
-                 target_lang = "hi-IN" # Fallback
-            
-            if target_lang != "en-IN":
-                translated_text = await translate_to_native(llm_response, target_lang)
-            else:
-                translated_text = llm_response
-                
-            print(f"Translated: {translated_text}")
-            
-            # 5. TTS (Bulbul)
-            audio_output = await synthesize_audio(translated_text, target_lang)
-            
-            # 6. Store in context
-            context["audio_response"] = audio_output
-            
-            # 7. Return TwiML
-            base_url = str(request.base_url).rstrip('/')
-            play_url = f"{base_url}/twilio/audio/{call_sid}"
-            
-            resp.play(play_url)
-            # Record again with silence detection
-            # Increased timeout to 5 to give user time to think/start speaking
-            resp.record(action="/twilio/voice", play_beep=False, timeout=2, max_length=60) 
-            
+        # If duration is missing or too short (e.g. < 1 second), it's likely silence/noise.
+        # Twilio might send '0' or '1'.
+        if duration and int(duration) <= 1:
+            print("Recording too short. Listening again...")
+            listen(resp, request, play_beep=False)
             return Response(content=str(resp), media_type="application/xml")
-            
+
+        if IMMEDIATE_ACK:
+            return acknowledge_turn(request, call_sid, context, recording_url)
+        resp = await process_recording(request, call_sid, context, recording_url)
+        return Response(content=str(resp), media_type="application/xml")
+        
+    else:
+        # Authenticated but no recording (maybe just finished auth greeting)
+        # Just wait for input
+        listen(resp, request)
+        return Response(content=str(resp), media_type="application/xml")
+
+async def process_recording(request: Request, call_sid: str, context: dict, recording_url: str) -> VoiceResponse:
+    """
+    Runs one recorded turn: download, VAD, STT, then the reply. Returns the
+    TwiML that plays the reply and records the next utterance (or asks again).
+    Mutates `context` in place.
+    """
+    resp = VoiceResponse()
+    with Stage("turn", context.get("language")) as span:
+        print(f"Downloading audio from: {recording_url}")
+        # 1. Download audio
+        audio_bytes = await download_recording(recording_url)
+
+        if audio_bytes is None:
+            print("Failed to download audio")
+            span.outcome = "no_audio"
+            play_prompt(resp, request, "could_not_hear", context.get("language"))
+            return resp
+
+        # Skip STT for breathing / line noise, and upload only the speech
+        if VAD_ENABLED:
+            with Stage("vad") as vad:
+                try:
+                    speech = trim_silence(audio_bytes, VAD_MIN_SPEECH_MS)
+                except Exception as e:
+                    print(f"VAD skipped: {e!r}")
+                    vad.outcome = "skipped"
+                    speech = audio_bytes
+                if speech is None:
+                    vad.outcome = "no_speech"
+            if speech is None:
+                print("No speech in recording. Listening again...")
+                span.outcome = "no_speech"
+                listen(resp, request, play_beep=False)
+                return resp
+            print(f"VAD trimmed recording from {len(audio_bytes)} to {len(speech)} bytes")
+            audio_bytes = speech
+
+        # 2. STT (English)
+        english_text, detected_lang = await speech_to_english(audio_bytes)
+        print(f"Transcript: {english_text}, Detected Lang: {detected_lang}")
+
+        # If transcript is empty, listen again
+        if not english_text or not english_text.strip():
+             print("Empty transcript. Listening again...")
+             span.outcome = "empty_transcript"
+             listen(resp, request, play_beep=False)
+             return resp
+
+        # Later fixed prompts follow the caller's language
+        context["language"] = resolve_language(detected_lang)
+        span.language = context["language"]
+
+        # 3-5. LLM (Reasoning) with History, then Translate + TTS per sentence,
+        # written into a stream that /twilio/audio serves while it grows
+        audio_output = AudioStream(PLAYBACK_SAMPLE_RATE, PLAYBACK_CODEC)
+        folds = []
+        replies = speak_reply(
+            context, english_text, detected_lang,
+            sample_rate=PLAYBACK_SAMPLE_RATE, stream_audio=True, call_sid=call_sid, codec=PLAYBACK_CODEC,
+            folds=folds,
+        )
+
+        # The history summary is saved once the reply audio is complete, so
+        # the caller never waits on it
+        async def save_summary():
+            await store_summary(call_state, call_sid, context, folds)
+
+        # 6. Store the audio for /twilio/audio
+        set_stream(call_sid, audio_output)
+
+        if PROGRESSIVE_PLAYBACK:
+            # Answer now; Twilio's <Play> fetch starts while synthesis runs.
+            # The webhook saves the context before the reply is complete, so the
+            # render saves the finished history itself before closing the stream.
+            async def save_history():
+                await call_state.merge(call_sid, history=context["history"], summary=context.get("summary", ""))
+
+            # Tracked so the render is cancelled if the caller hangs up
+            call_tasks.track(call_sid, asyncio.create_task(
+                render_to_stream(replies, audio_output, before_close=save_history, after_close=save_summary)
+            ))
         else:
-            # Authenticated but no recording (maybe just finished auth greeting)
-            # Just wait for input
-            resp.record(action="/twilio/voice", play_beep=True, timeout=2, max_length=60)
-            return Response(content=str(resp), media_type="application/xml")
+            await render_to_stream(replies, audio_output)
+            await share_clip(call_sid, "reply", audio_output.id, audio_output.wav_bytes())
+            call_tasks.track(call_sid, asyncio.create_task(save_summary()))
+
+        # 7. Return TwiML
+        base_url = str(request.base_url).rstrip('/')
+        play_url = f"{base_url}/twilio/audio/{call_sid}?clip={audio_output.id}"
 
+        resp.play(play_url)
+        # Listen for the next utterance (Record with silence detection, or the media stream)
+        listen(resp, request, play_beep=False)
+
+        return resp
+
+async def share_clip(call_sid: str, name: str, clip_id: str, audio: bytes):
+    """
+    Copies a finished clip to the call-state store, since Twilio's <Play>
+    fetch may reach another instance. A failure only loses that fallback.
+    """
+    try:
+        await call_state.put_clip(call_sid, name, clip_id, audio)
     except Exception as e:
-        import traceback
-        with open("error.log", "w") as f:
-            f.write(traceback.format_exc())
-            f.write(f"\nError: {e!r}")
-        print(f"Error: {e}")
-        resp = VoiceResponse()
-        resp.say("Sorry, an error occurred.")
+        print(f"Error storing {name} audio for {call_sid}: {e!r}")
+
+def acknowledge_turn(request: Request, call_sid: str, context: dict, recording_url: str) -> Response:
+    """
+    Hands a recorded turn to a background task and answers right away with a
+    filler prompt and a <Redirect> to /twilio/poll, so no single webhook
+    request waits on STT, the LLM and TTS.
+    """
+    turn_id = uuid.uuid4().hex[:12]
+    context["pending_turn"] = {"id": turn_id, "recording_url": recording_url}
+    # The task takes the call lock, so it starts once this webhook has saved
+    start_turn(request, call_sid, turn_id)
+
+    resp = VoiceResponse()
+    play_prompt(resp, request, "one_moment", context.get("language"))
+    resp.redirect(f"/twilio/poll/{call_sid}?turn={turn_id}", method="POST")
+    return Response(content=str(resp), media_type="application/xml")
+
+def start_turn(request: Request, call_sid: str, turn_id: str) -> asyncio.Task:
+    """
+    Starts (or returns the already running) background task for a turn.
+    """
+    running = _turn_tasks.get(call_sid)
+    if running and running[0] == turn_id:
+        return running[1]
+
+    task = call_tasks.track(call_sid, asyncio.create_task(run_pending_turn(request, call_sid, turn_id)))
+    _turn_tasks[call_sid] = (turn_id, task)
+
+    def forget(_):
+        if _turn_tasks.get(call_sid, (None, None))[1] is task:
+            del _turn_tasks[call_sid]
+
+    task.add_done_callback(forget)
+    return task
+
+async def run_pending_turn(request: Request, call_sid: str, turn_id: str) -> str:
+    """
+    Processes a pending turn under the call lock and stores its TwiML in the
+    call state for whichever instance serves the poll. Returns the TwiML.
+    """
+    try:
+        async with call_state.update(call_sid) as context:
+            result = context.get("turn_result")
+            if result and result["id"] == turn_id:
+                return result["twiml"]
+            pending = context.get("pending_turn")
+            if not pending or pending["id"] != turn_id:
+                raise LookupError(f"Turn {turn_id} is not pending for {call_sid}")
+
+            resp = await process_recording(request, call_sid, context, pending["recording_url"])
+            twiml = str(resp)
+            context["pending_turn"] = None
+            context["turn_result"] = {"id": turn_id, "twiml": twiml}
+            return twiml
+    except LookupError:
+        raise
+    except Exception as e:
+        print(f"Background turn failed: {e!r}")
+        language = None
+        # Re-read before recording the failure: another instance may have
+        # finished this turn meanwhile, and its reply must not be overwritten
+        try:
+            async with call_state.update(call_sid, create=False) as context:
+                if context is not None:
+                    language = context.get("language")
+                    result = context.get("turn_result")
+                    if result and result["id"] == turn_id:
+                        return result["twiml"]
+                    if (context.get("pending_turn") or {}).get("id") == turn_id:
+                        twiml = turn_error_twiml(request, language)
+                        context["pending_turn"] = None
+                        context["turn_result"] = {"id": turn_id, "twiml": twiml}
+                        return twiml
+        except Exception as e:
+            print(f"Could not record failed turn {turn_id}: {e!r}")
+        return turn_error_twiml(request, language)
+
+def turn_error_twiml(request: Request, language: str | None = None) -> str:
+    """
+    TwiML for a turn that failed: the error prompt in the caller's language,
+    then listening for the next utterance so the call carries on.
+    """
+    resp = VoiceResponse()
+    play_prompt(resp, request, "error", language)
+    listen(resp, request, play_beep=False)
+    return str(resp)
+
+@router.post("/twilio/poll/{call_sid}")
+async def poll_turn(request: Request, call_sid: str, turn: str):
+    """
+    Long-polls a background turn. Returns the reply TwiML once it is ready,
+    otherwise a short pause and a <Redirect> back here after POLL_TIMEOUT.
+    """
+    with Stage("poll") as span:
+        return await _poll_turn(request, call_sid, turn, span)
+
+async def _poll_turn(request: Request, call_sid: str, turn: str, span: Stage) -> Response:
+    running = _turn_tasks.get(call_sid)
+    task = running[1] if running and running[0] == turn else None
+
+    if task is None:
+        context = await call_state.get(call_sid) or {}
+        result = context.get("turn_result")
+        pending = context.get("pending_turn")
+        span.language = context.get("language")
+        if result and result["id"] == turn:
+            return Response(content=result["twiml"], media_type="application/xml")
+        if pending and pending["id"] == turn:
+            # The instance that acknowledged the turn isn't serving us (or was
+            # frozen); run it here. Both runs take the call lock (a Redis lock
+            # or DynamoDB lease across instances), and whichever goes second
+            # finds the stored turn_result and returns it instead of re-running.
+            task = start_turn(request, call_sid, turn)
+
+    resp = VoiceResponse()
+    if task is None:
+        # Nothing pending for this turn (e.g. the state expired); just listen
+        span.outcome = "missing"
+        listen(resp, request)
+        return Response(content=str(resp), media_type="application/xml")
+
+    try:
+        twiml = await asyncio.wait_for(asyncio.shield(task), POLL_TIMEOUT)
+        return Response(content=twiml, media_type="application/xml")
+    except asyncio.TimeoutError:
+        print(f"Turn {turn} still running for {call_sid}. Polling again...")
+        span.outcome = "pending"
+    except asyncio.CancelledError:
+        if not task.cancelled():
+            raise
+        # The call ended (status callback) while the turn was running
+        span.outcome = "cancelled"
+        resp.hangup()
+        return Response(content=str(resp), media_type="application/xml")
+    except LookupError as e:
+        print(f"Poll: {e}")
+        span.outcome = "missing"
+        listen(resp, request)
         return Response(content=str(resp), media_type="application/xml")
+    except Exception as e:
+        print(f"Error: {e}")
+        span.outcome = "error"
+        try:
+            language = (await call_state.get(call_sid) or {}).get("language")
+        except Exception:
+            language = None
+        return Response(content=turn_error_twiml(request, language), media_type="application/xml")
+
+    resp.pause(length=1)
+    resp.redirect(f"/twilio/poll/{call_sid}?turn={turn}", method="POST")
+    return Response(content=str(resp), media_type="application/xml")
 
 @router.get("/twilio/audio/{call_sid}")
-async def get_audio(call_sid: str):
+async def get_audio(call_sid: str, clip: str | None = None):
     """
     Serves the generated audio for a specific call.
+    The WAV is sent with chunked transfer and grows as TTS chunks arrive.
+    Finished replies rendered on another instance are served from the
+    call-state store.
+    """
+    audio = get_stream(call_sid)
+    if not audio or (clip and audio.id != clip):
+        stored = await call_state.get_clip(call_sid, "reply", clip) if clip else None
+        if not stored:
+            raise HTTPException(status_code=404, detail="Audio not found")
+        return Response(content=stored, media_type="audio/wav", headers={"Cache-Control": "no-cache"})
+    
+    # Twilio must not cache the reply audio
+    return StreamingResponse(
+        audio.iter_wav(),
+        media_type="audio/wav",
+        headers={"Cache-Control": "no-cache"},
+    )
+
+@router.get("/twilio/greeting/{call_sid}")
+async def get_greeting(call_sid: str, clip: str | None = None):
     """
-    context = call_context.get(call_sid)
-    if not context or not context["audio_response"]:
-        raise HTTPException(status_code=404, detail="Audio not found")
+    Serves the personalized greeting pre-rendered during the PIN prompt, only
+    to the call whose authenticated user it was rendered for (or the copy
+    stored for it when the prefetch ran on another instance).
+    """
+    context = await call_state.get(call_sid) or {}
+    audio = prefetched_greeting(call_sid, context.get("user"))
+    if not audio and clip:
+        audio = await call_state.get_clip(call_sid, "greeting", clip)
+    if not audio:
+        raise HTTPException(status_code=404, detail="Greeting not found")
+    return Response(content=audio, media_type="audio/wav", headers={"Cache-Control": "no-cache"})
+
+@router.post("/twilio/status")
+async def handle_status_callback(request: Request):
+    """
+    Twilio call status callback. Frees the call's context and audio once the
+    call has ended.
+    """
+    form_data = await request.form()
+    call_sid = form_data.get("CallSid")
+    call_status = form_data.get("CallStatus")
+    print(f"Call {call_sid} status: {call_status}")
+    
+    if call_sid and call_status in TERMINAL_STATUSES:
+        await end_call(call_sid)
+    return Response(status_code=204)
+
+@router.get("/twilio/prompts/{language}/{phrase}.wav")
+async def get_prompt(language: str, phrase: str):
+    """
+    Serves a pre-rendered IVR prompt. URLs carry a content version, so the
+    audio can be cached indefinitely by Twilio and any CDN in front of us.
+    """
+    if phrase not in load_manifest().get(language, {}):
+        raise HTTPException(status_code=404, detail="Prompt not found")
     
-    return StreamingResponse(io.BytesIO(context["audio_response"]), media_type="audio/wav")
+    return FileResponse(
+        prompt_path(language, phrase),
+        media_type="audio/wav",
+        headers={"Cache-Control": "public, max-age=31536000, immutable"},
+    )
+
+@router.websocket("/twilio/stream")
+async def media_stream(websocket: WebSocket):
+    """
+    Twilio Media Streams endpoint. Receives live 8 kHz μ-law audio and sends
+    synthesized replies back on the same socket.
+    """
+    await websocket.accept()
+    session = MediaStreamSession(websocket, call_state)
+    try:
+        await session.run()
+    except WebSocketDisconnect:
+        print(f"Media stream disconnected: {session.call_sid}")
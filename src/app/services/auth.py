@@ -1,24 +1,113 @@
-from supabase import create_client, Client
-from app.config import SUPABASE_URL, SUPABASE_KEY
+import hashlib
+import hmac
+from app.config import (
+    SUPABASE_URL,
+    SUPABASE_KEY,
+    USER_PROFILE_COLUMNS,
+    USER_PHONE_COLUMN,
+    PIN_HASH_COLUMN,
+    PIN_PEPPER,
+    AUTH_CACHE_SIZE,
+    AUTH_CACHE_TTL,
+    AUTH_NEGATIVE_CACHE_TTL,
+)
+from app.services import registry
+from app.utils.cache import TTLCache
+from app.utils.timing import timed
 
-# Initialize Supabase Client
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+async def _build_supabase():
+    # The async client must be built inside the event loop
+    from supabase import acreate_client
+    return await acreate_client(SUPABASE_URL, SUPABASE_KEY)
 
+registry.register("supabase", _build_supabase)
+
+# PIN digest -> user profile (or None for an unknown PIN)
+_profile_cache = TTLCache(AUTH_CACHE_SIZE, AUTH_CACHE_TTL)
+_NOT_FOUND = "not-found"
+
+async def get_supabase():
+    """
+    Returns the async Supabase client, created on first use.
+    """
+    return await registry.aget("supabase")
+
+def hash_pin(pin: str) -> str:
+    """
+    Peppered SHA-256 of a PIN, as stored in PIN_HASH_COLUMN.
+    """
+    return hmac.new(PIN_PEPPER.encode(), pin.encode(), hashlib.sha256).hexdigest()
+
+@timed("supabase_pin", outcome=lambda user: "ok" if user else "not_found")
 async def verify_user_pin(pin: str) -> dict | None:
     """
     Verifies the user PIN against the 'user_profiles' table.
     Returns user data (dict) if valid, else None.
+
+    Only USER_PROFILE_COLUMNS are fetched. Results are cached briefly (misses
+    for a shorter time) so bursts of calls don't each cost a Supabase round-trip.
+    When PIN_HASH_COLUMN is set the lookup is by peppered hash instead of the
+    plain PIN.
     """
+    digest = hash_pin(pin)
+    cached = _profile_cache.get(digest)
+    if cached is not None:
+        return None if cached == _NOT_FOUND else cached
+
     try:
-        print(f"Verifying PIN: {pin}")
-        response = supabase.table("user_profiles").select("*").eq("pin", pin).execute()
-        print(f"Supabase Response: {response}")
-        
-        if response.data and len(response.data) > 0:
-            return response.data[0] # Return the first matching user
+        supabase = await get_supabase()
+        query = supabase.table("user_profiles").select(USER_PROFILE_COLUMNS)
+        if PIN_HASH_COLUMN:
+            query = query.eq(PIN_HASH_COLUMN, digest)
         else:
-            return None
-            
+            query = query.eq("pin", pin)
+        response = await query.limit(1).execute()
     except Exception as e:
         print(f"Error verifying PIN: {e}")
         return None
+
+    if response.data:
+        user = response.data[0] # Return the first matching user
+        _profile_cache.set(digest, user)
+        return user
+
+    _profile_cache.set(digest, _NOT_FOUND, ttl=AUTH_NEGATIVE_CACHE_TTL)
+    return None
+
+@timed("supabase_lookup", outcome=lambda profile: "ok" if profile else "not_found")
+async def lookup_caller(phone: str) -> dict | None:
+    """
+    Fetches the profile registered to a caller's phone number, including its
+    PIN (or PIN hash) so the PIN can later be checked locally with
+    check_pin(). Returns None if no single profile matches.
+    """
+    pin_column = PIN_HASH_COLUMN or "pin"
+    try:
+        supabase = await get_supabase()
+        response = await (
+            supabase.table("user_profiles")
+            .select(f"{USER_PROFILE_COLUMNS},{pin_column}")
+            .eq(USER_PHONE_COLUMN, phone)
+            .limit(2)
+            .execute()
+        )
+    except Exception as e:
+        print(f"Error looking up caller: {e}")
+        return None
+
+    # A number shared by several profiles can't identify the caller
+    if len(response.data) != 1:
+        return None
+    return response.data[0]
+
+def check_pin(profile: dict, pin: str) -> dict | None:
+    """
+    Compares a PIN against a profile from lookup_caller().
+    Returns the profile without its PIN field on a match, else None.
+    """
+    pin_column = PIN_HASH_COLUMN or "pin"
+    stored = profile.get(pin_column)
+    candidate = hash_pin(pin) if PIN_HASH_COLUMN else pin
+    if stored is None or not hmac.compare_digest(str(stored), candidate):
+        return None
+    return {key: value for key, value in profile.items() if key != pin_column}
@@ -0,0 +1,405 @@
+import asyncio
+import copy
+import json
+import time
+import uuid
+import zlib
+import weakref
+from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
+
+from app.config import (
+    CALL_STATE_BACKEND,
+    CALL_STATE_TTL,
+    CALL_STATE_MAX_CALLS,
+    CALL_STATE_LOCK_TIMEOUT,
+    CALL_STATE_WRITE_RETRIES,
+    REDIS_URL,
+    CALL_STATE_TABLE,
+)
+from app.utils.cache import TTLCache
+
+# Payloads larger than this are zlib-compressed
+COMPRESS_THRESHOLD = 1024
+_RAW = b"j"
+_ZLIB = b"z"
+
+def new_call_state() -> dict:
+    """
+    Returns the state for a call we haven't seen before.
+    """
+    return {
+        "authenticated": False,
+        "user": None,
+        "history": [], # Gemini history format, recent turns only
+        "summary": "", # Running summary of turns folded out of history
+        "language": None, # Caller's language once detected
+        "pending_turn": None, # {"id", "recording_url"} awaiting a background turn
+        "turn_result": None, # {"id", "twiml"} of the last background turn
+    }
+
+def dumps_state(state: dict) -> bytes:
+    """
+    Serializes call state to compact JSON, compressing large payloads.
+    """
+    raw = json.dumps(state, separators=(",", ":"), ensure_ascii=False, default=str).encode("utf-8")
+    if len(raw) > COMPRESS_THRESHOLD:
+        return _ZLIB + zlib.compress(raw, 6)
+    return _RAW + raw
+
+def loads_state(payload: bytes) -> dict:
+    """
+    Inverse of dumps_state().
+    """
+    tag, body = payload[:1], payload[1:]
+    if tag == _ZLIB:
+        body = zlib.decompress(body)
+    return json.loads(body.decode("utf-8"))
+
+class CallStateStore(ABC):
+    """
+    Per-call conversation state keyed by CallSid.
+
+    Backends implement get/put/delete and _lock(). update() wraps a
+    read-modify-write in the backend's per-call lock so concurrent webhooks for
+    the same call can't lose each other's changes, even across instances.
+    """
+
+    def __init__(self, ttl: float = CALL_STATE_TTL):
+        # Calls this process has handled recently (for the live-calls gauge)
+        self._active = TTLCache(CALL_STATE_MAX_CALLS, ttl)
+
+    @abstractmethod
+    async def get(self, call_sid: str) -> dict | None:
+        ...
+
+    @abstractmethod
+    async def put(self, call_sid: str, state: dict):
+        ...
+
+    @abstractmethod
+    async def delete(self, call_sid: str):
+        ...
+
+    @abstractmethod
+    def _lock(self, call_sid: str):
+        """
+        Async context manager serializing updates of one call.
+        """
+
+    def active_calls(self) -> int:
+        """
+        Number of live calls this process has handled within the idle TTL.
+        """
+        self._active.expire()
+        return len(self._active)
+
+    async def put_clip(self, call_sid: str, name: str, clip_id: str, audio: bytes):
+        """
+        Keeps a finished audio clip of the call (the reply or the greeting)
+        where any instance can serve it, replacing the previous clip of that
+        name. Process-local backends don't need to, so this does nothing.
+        """
+
+    async def get_clip(self, call_sid: str, name: str, clip_id: str) -> bytes | None:
+        """
+        The clip stored by put_clip() under `name`, if it is still `clip_id`.
+        """
+        return None
+
+    async def end_call(self, call_sid: str):
+        """
+        Removes a finished call's state.
+        """
+        await self.delete(call_sid)
+        self._active.pop(call_sid)
+
+    @asynccontextmanager
+    async def update(self, call_sid: str, create: bool = True):
+        """
+        Yields the call's state under the per-call lock and saves it when the
+        block exits without an error. An unknown call gets a fresh state, or
+        with `create=False` yields None and nothing is saved.
+        """
+        async with self._lock(call_sid):
+            state = await self.get(call_sid)
+            if state is None and not create:
+                yield None
+                return
+            self._active.set(call_sid, True)
+            state = state or new_call_state()
+            yield state
+            await self.put(call_sid, state)
+
+    async def merge(self, call_sid: str, create: bool = False, **fields):
+        """
+        Atomically sets individual fields on the call's state. Does nothing
+        for a call that no longer exists (e.g. one that ended while a reply
+        was still rendering) unless `create` is set.
+        """
+        async with self.update(call_sid, create=create) as state:
+            if state is not None:
+                state.update(fields)
+
+    async def expire(self) -> list:
+        """
+        Forgets calls idle longer than the TTL and returns their CallSids.
+        Backends with native expiry (Redis, DynamoDB TTL) only drop the local
+        bookkeeping here.
+        """
+        return self._active.expire()
+
+class InMemoryCallStateStore(CallStateStore):
+    """
+    Process-local store: bounded LRU with idle TTL. Only correct when every
+    webhook for a call reaches the same process.
+    """
+
+    def __init__(self, max_calls: int = CALL_STATE_MAX_CALLS, ttl: float = CALL_STATE_TTL):
+        super().__init__(ttl)
+        self._calls = TTLCache(max_calls, ttl)
+        self._locks = weakref.WeakValueDictionary()
+
+    async def get(self, call_sid: str) -> dict | None:
+        return self._calls.get(call_sid)
+
+    async def put(self, call_sid: str, state: dict):
+        self._calls.set(call_sid, state)
+
+    async def delete(self, call_sid: str):
+        self._calls.pop(call_sid)
+
+    def _lock(self, call_sid: str):
+        lock = self._locks.get(call_sid)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._locks[call_sid] = lock
+        return lock
+
+    async def expire(self) -> list:
+        self._active.expire()
+        return self._calls.expire()
+
+    def active_calls(self) -> int:
+        return len(self._calls)
+
+class RedisCallStateStore(CallStateStore):
+    """
+    Redis (or any Redis-protocol server) backend. State lives under
+    `call:{CallSid}` with a sliding TTL; updates hold a Redis lock per call.
+    Audio clips are fields of the hash `audio:{CallSid}`.
+    Requires the optional `redis` package.
+    """
+
+    def __init__(self, url: str = REDIS_URL, ttl: float = CALL_STATE_TTL):
+        import redis.asyncio as redis
+
+        super().__init__(ttl)
+        self._redis = redis.from_url(url)
+        self._ttl = int(ttl)
+
+    async def get(self, call_sid: str) -> dict | None:
+        payload = await self._redis.get(f"call:{call_sid}")
+        return loads_state(payload) if payload else None
+
+    async def put(self, call_sid: str, state: dict):
+        await self._redis.set(f"call:{call_sid}", dumps_state(state), ex=self._ttl)
+
+    async def delete(self, call_sid: str):
+        await self._redis.delete(f"call:{call_sid}", f"audio:{call_sid}")
+
+    async def put_clip(self, call_sid: str, name: str, clip_id: str, audio: bytes):
+        key = f"audio:{call_sid}"
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.hset(key, name, clip_id.encode() + b":" + audio)
+            pipe.expire(key, self._ttl)
+            await pipe.execute()
+
+    async def get_clip(self, call_sid: str, name: str, clip_id: str) -> bytes | None:
+        value = await self._redis.hget(f"audio:{call_sid}", name)
+        if not value:
+            return None
+        stored_id, _, audio = value.partition(b":")
+        return audio if stored_id.decode() == clip_id else None
+
+    def _lock(self, call_sid: str):
+        return self._redis.lock(f"call-lock:{call_sid}", timeout=CALL_STATE_LOCK_TIMEOUT, blocking_timeout=CALL_STATE_LOCK_TIMEOUT)
+
+class DynamoDBCallStateStore(CallStateStore):
+    """
+    DynamoDB backend for Lambda deployments. Items are
+    {call_sid, state (binary), version, expires_at}; enable DynamoDB TTL on
+    `expires_at`. update() holds a lease item `lock#{CallSid}` (taken with a
+    conditional write, expiring after CALL_STATE_LOCK_TIMEOUT) so instances
+    take turns. Writes are also conditional on the version read; if another
+    instance wrote in between (e.g. after a lease expired), update() re-reads
+    the item and re-applies the fields its block changed, up to
+    CALL_STATE_WRITE_RETRIES times. Audio clips are attributes of the item
+    `audio#{CallSid}`, each up to CLIP_MAX_BYTES (items are capped at 400 KB).
+    Uses boto3 (bundled with the Lambda runtime) on a worker thread.
+    """
+
+    # About 40 s of 8 kHz μ-law, leaving room for the greeting in the same item
+    CLIP_MAX_BYTES = 320 * 1024
+
+    def __init__(self, table: str = CALL_STATE_TABLE, ttl: float = CALL_STATE_TTL):
+        import boto3
+
+        super().__init__(ttl)
+        self._table = boto3.resource("dynamodb").Table(table)
+        self._ttl = int(ttl)
+        self._versions = TTLCache(CALL_STATE_MAX_CALLS, ttl)
+        self._locks = weakref.WeakValueDictionary()
+
+    async def get(self, call_sid: str) -> dict | None:
+        response = await asyncio.to_thread(self._table.get_item, Key={"call_sid": call_sid}, ConsistentRead=True)
+        item = response.get("Item")
+        if not item or int(item.get("expires_at", 0)) < time.time():
+            self._versions.pop(call_sid)
+            return None
+        self._versions.set(call_sid, int(item["version"]))
+        return loads_state(bytes(item["state"]))
+
+    async def put(self, call_sid: str, state: dict):
+        version = self._versions.get(call_sid)
+        item = {
+            "call_sid": call_sid,
+            "state": dumps_state(state),
+            "version": (version or 0) + 1,
+            "expires_at": int(time.time()) + self._ttl,
+        }
+        if version is None:
+            condition = {"ConditionExpression": "attribute_not_exists(call_sid) OR expires_at < :now",
+                         "ExpressionAttributeValues": {":now": int(time.time())}}
+        else:
+            condition = {"ConditionExpression": "version = :version",
+                         "ExpressionAttributeValues": {":version": version}}
+        await asyncio.to_thread(self._table.put_item, Item=item, **condition)
+        self._versions.set(call_sid, item["version"])
+
+    async def delete(self, call_sid: str):
+        await asyncio.to_thread(self._table.delete_item, Key={"call_sid": call_sid})
+        await asyncio.to_thread(self._table.delete_item, Key={"call_sid": f"audio#{call_sid}"})
+        self._versions.pop(call_sid)
+
+    async def put_clip(self, call_sid: str, name: str, clip_id: str, audio: bytes):
+        if len(audio) > self.CLIP_MAX_BYTES:
+            print(f"Not storing {len(audio)}-byte {name} clip for {call_sid}: over {self.CLIP_MAX_BYTES} bytes")
+            return
+        await asyncio.to_thread(
+            self._table.update_item,
+            Key={"call_sid": f"audio#{call_sid}"},
+            UpdateExpression="SET #name = :clip, expires_at = :expires_at",
+            ExpressionAttributeNames={"#name": name},
+            ExpressionAttributeValues={":clip": {"id": clip_id, "audio": audio}, ":expires_at": int(time.time()) + self._ttl},
+        )
+
+    async def get_clip(self, call_sid: str, name: str, clip_id: str) -> bytes | None:
+        response = await asyncio.to_thread(self._table.get_item, Key={"call_sid": f"audio#{call_sid}"}, ConsistentRead=True)
+        clip = response.get("Item", {}).get(name)
+        if not clip or clip["id"] != clip_id:
+            return None
+        return bytes(clip["audio"])
+
+    @asynccontextmanager
+    async def update(self, call_sid: str, create: bool = True):
+        async with self._lock(call_sid):
+            state = await self.get(call_sid)
+            if state is None and not create:
+                yield None
+                return
+            self._active.set(call_sid, True)
+            state = state or new_call_state()
+            original = copy.deepcopy(state)
+            yield state
+
+            for attempt in range(CALL_STATE_WRITE_RETRIES + 1):
+                try:
+                    await self.put(call_sid, state)
+                    return
+                except Exception as e:
+                    if not _is_conflict(e) or attempt == CALL_STATE_WRITE_RETRIES:
+                        raise
+                print(f"Call state conflict for {call_sid}; re-applying changes (attempt {attempt + 1})")
+                changed = {key: value for key, value in state.items() if original.get(key) != value}
+                removed = original.keys() - state.keys()
+                state = await self.get(call_sid)
+                if state is None and not create:
+                    return
+                state = state or new_call_state()
+                original = copy.deepcopy(state)
+                for key in removed:
+                    state.pop(key, None)
+                state.update(changed)
+
+    def _lock(self, call_sid: str):
+        return self._lease(call_sid)
+
+    @asynccontextmanager
+    async def _lease(self, call_sid: str):
+        # Waiters in this instance queue on a local lock instead of polling DynamoDB
+        lock = self._locks.get(call_sid)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._locks[call_sid] = lock
+
+        async with lock:
+            key = {"call_sid": f"lock#{call_sid}"}
+            owner = uuid.uuid4().hex
+            deadline = time.monotonic() + CALL_STATE_LOCK_TIMEOUT
+            delay = 0.05
+            while True:
+                now = int(time.time())
+                lease_until = now + int(CALL_STATE_LOCK_TIMEOUT) + 1
+                try:
+                    await asyncio.to_thread(
+                        self._table.put_item,
+                        Item={**key, "owner": owner, "lease_until": lease_until, "expires_at": lease_until},
+                        ConditionExpression="attribute_not_exists(call_sid) OR lease_until < :now",
+                        ExpressionAttributeValues={":now": now},
+                    )
+                    break
+                except Exception as e:
+                    if not _is_conflict(e):
+                        raise
+                if time.monotonic() + delay > deadline:
+                    raise TimeoutError(f"Call state lease for {call_sid} not acquired within {CALL_STATE_LOCK_TIMEOUT}s")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 0.5)
+
+            try:
+                yield
+            finally:
+                try:
+                    await asyncio.to_thread(
+                        self._table.delete_item,
+                        Key=key,
+                        ConditionExpression="#owner = :owner",
+                        ExpressionAttributeNames={"#owner": "owner"},
+                        ExpressionAttributeValues={":owner": owner},
+                    )
+                except Exception as e:
+                    # Our lease expired and someone else holds it now
+                    if not _is_conflict(e):
+                        print(f"Error releasing call state lease for {call_sid}: {e!r}")
+
+def _is_conflict(error: Exception) -> bool:
+    """
+    True for DynamoDB's ConditionalCheckFailedException (a concurrent write).
+    """
+    response = getattr(error, "response", None) or {}
+    return response.get("Error", {}).get("Code") == "ConditionalCheckFailedException"
+
+def create_store(backend: str = CALL_STATE_BACKEND) -> CallStateStore:
+    """
+    Builds the configured call-state backend: "memory", "redis" or "dynamodb".
+    """
+    if backend == "redis":
+        return RedisCallStateStore()
+    if backend == "dynamodb":
+        return DynamoDBCallStateStore()
+    if backend == "memory":
+        return InMemoryCallStateStore()
+    raise ValueError(f"Unknown CALL_STATE_BACKEND: {backend}")
+
+call_state = create_store()
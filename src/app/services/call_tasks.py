@@ -0,0 +1,31 @@
+import asyncio
+
+# Background work still running for a call after its webhook returned (reply
+# renders, IMMEDIATE_ACK turns), per process.
+# Key: CallSid, Value: set of asyncio.Task
+_tasks = {}
+
+def track(call_sid: str, task: asyncio.Task) -> asyncio.Task:
+    """
+    Keeps a reference to `task` until it finishes, so cancel() can stop it if
+    the call ends first.
+    """
+    tasks = _tasks.setdefault(call_sid, set())
+    tasks.add(task)
+
+    def forget(_):
+        tasks.discard(task)
+        if not tasks and _tasks.get(call_sid) is tasks:
+            del _tasks[call_sid]
+
+    task.add_done_callback(forget)
+    return task
+
+def cancel(call_sid: str) -> int:
+    """
+    Cancels the call's unfinished tasks. Returns how many were cancelled.
+    """
+    tasks = _tasks.pop(call_sid, set())
+    for task in tasks:
+        task.cancel()
+    return len(tasks)
@@ -0,0 +1,53 @@
+from app.config import CALL_STATE_MAX_CALLS, CALL_STATE_TTL
+from app.services.llm import start_chat
+from app.services.history import prompt_history
+from app.utils.cache import TTLCache
+
+# Live Gemini chat sessions, per process
+# Key: CallSid
+# Value: {"chat": ChatSession, "summary": str, "turns": int}
+# The call-state store holds the serializable side (history + summary), so any
+# instance can rebuild a session; a local one is reused while it is in sync.
+_sessions = TTLCache(CALL_STATE_MAX_CALLS, CALL_STATE_TTL)
+
+def _in_sync(entry: dict, context: dict) -> bool:
+    # Stale if another instance took a turn or old turns were folded into the summary
+    return entry["summary"] == context.get("summary", "") and entry["turns"] == len(context["history"])
+
+async def get_chat(call_sid: str, context: dict):
+    """
+    Returns the call's chat session, reusing the live one when it matches the
+    stored context and rebuilding it from the context otherwise.
+    """
+    entry = _sessions.get(call_sid)
+    if entry is not None and _in_sync(entry, context):
+        return entry["chat"]
+    return await start_chat(prompt_history(context))
+
+def save_chat(call_sid: str, context: dict, chat, sent: int, summary: str):
+    """
+    Keeps `chat` for the call's next turn, once the turn has been recorded in
+    context["history"]. `sent` is len(chat.history) and `summary` the context
+    summary from before the turn. Sessions that didn't record the exchange
+    (failed or timed-out replies), or whose turns were just folded into the
+    summary, are dropped. Never raises, so the caller's history is still saved.
+    """
+    try:
+        recorded = len(chat.history)
+    except Exception as e:
+        # The SDK refuses to read the history of a session whose last
+        # response broke off: IncompleteIterationError after a mid-stream
+        # timeout, BrokenResponseError after a SAFETY or other non-STOP finish
+        print(f"Dropping chat session for {call_sid}: {e!r}")
+        _sessions.pop(call_sid)
+        return
+    if recorded != sent + 2 or summary != context.get("summary", ""):
+        _sessions.pop(call_sid)
+        return
+    _sessions.set(call_sid, {"chat": chat, "summary": context.get("summary", ""), "turns": len(context["history"])})
+
+def discard(call_sid: str):
+    _sessions.pop(call_sid)
+
+def expire() -> list:
+    return _sessions.expire()
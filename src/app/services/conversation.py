@@ -0,0 +1,153 @@
+import asyncio
+from app.services.llm import stream_llm
+from app.services.history import prompt_history, fold_history
+from app.services import chat_sessions
+from app.services.translator import translate_to_native
+from app.services.text_to_speech import synthesize_audio, synthesize_audio_stream
+from app.utils.text import split_sentences
+from app.utils.timing import timed
+
+DEFAULT_LANGUAGE = "hi-IN"
+
+def resolve_language(detected_lang: str | None) -> str:
+    """
+    Picks the reply language from the STT language detection.
+    """
+    if not detected_lang or detected_lang == "unknown":
+        return DEFAULT_LANGUAGE # Fallback
+    return detected_lang
+
+async def translate_reply(sentence: str, target_lang: str) -> str:
+    """
+    Translates one English reply sentence into the caller's language.
+    """
+    if target_lang == "en-IN":
+        return sentence
+    translated = await translate_to_native(sentence, target_lang)
+    print(f"Translated: {translated}")
+    return translated
+
+async def render_sentence(
+    sentence: str,
+    target_lang: str,
+    sample_rate: int | None = None,
+    stream_audio: bool = False,
+    codec: str = "linear16",
+):
+    """
+    Translates and synthesizes one sentence, yielding its audio.
+    Yields a single WAV clip, or raw `codec` chunks as they are generated when
+    `stream_audio` is set.
+    """
+    translated = await translate_reply(sentence, target_lang)
+    if stream_audio:
+        async for chunk in synthesize_audio_stream(translated, target_lang, sample_rate=sample_rate or 22050, codec=codec):
+            yield chunk
+    else:
+        yield await synthesize_audio(translated, target_lang, sample_rate=sample_rate, codec="mulaw" if codec == "mulaw" else "wav")
+
+async def _pump(source, queue: asyncio.Queue):
+    # Buffers one sentence's audio until the consumer reaches it
+    try:
+        async for chunk in source:
+            queue.put_nowait(chunk)
+    except Exception as e:
+        queue.put_nowait(e)
+    finally:
+        queue.put_nowait(None)
+
+@timed("reply", language="detected_lang")
+async def speak_reply(
+    context: dict,
+    user_text: str,
+    detected_lang: str | None,
+    sample_rate: int | None = None,
+    stream_audio: bool = False,
+    call_sid: str | None = None,
+    codec: str = "linear16",
+    folds: list | None = None,
+):
+    """
+    Runs one conversational turn and yields the reply audio sentence by sentence.
+
+    Gemini output is streamed and cut at sentence boundaries. Each sentence is
+    translated and synthesized as soon as it is complete, concurrently with the
+    rest of the generation, and audio is yielded in reply order, so the first
+    audio is ready after the first sentence rather than the whole answer.
+
+    By default one WAV clip is yielded per sentence. With `stream_audio`, raw
+    chunks are yielded as the TTS stream produces them: 16-bit PCM at
+    `sample_rate`, or 8 kHz μ-law with codec="mulaw".
+    Updates context["history"] once the full reply has been generated.
+    With `folds`, turns past the history window are summarized meanwhile: the
+    fold_history() task is appended to it and not awaited here, so the reply
+    audio can end before the summary does. The caller awaits it afterwards
+    (see store_summary).
+    With `call_sid`, the call's Gemini chat session is continued across turns.
+    """
+    target_lang = resolve_language(detected_lang)
+    
+    # The user message goes as the prompt, not in the history
+    if call_sid:
+        chat = await chat_sessions.get_chat(call_sid, context)
+        history = None
+        sent = len(chat.history)
+        summary = context.get("summary", "")
+    else:
+        chat = None
+        history = prompt_history(context)
+    # Summarize old turns while this reply is generated
+    if folds is not None:
+        folds.append(asyncio.create_task(fold_history(context)))
+
+    # One queue per sentence, in reply order
+    sentences = asyncio.Queue()
+    pumps = []
+    reply_parts = []
+
+    def start_sentence(sentence: str):
+        queue = asyncio.Queue()
+        pumps.append(asyncio.create_task(_pump(render_sentence(sentence, target_lang, sample_rate, stream_audio, codec), queue)))
+        sentences.put_nowait(queue)
+
+    async def produce():
+        buffer = ""
+        try:
+            async for chunk in stream_llm(user_text, history=history, chat=chat):
+                buffer += chunk
+                reply_parts.append(chunk)
+                complete, buffer = split_sentences(buffer)
+                for sentence in complete:
+                    start_sentence(sentence)
+            if buffer.strip():
+                start_sentence(buffer.strip())
+
+            llm_response = "".join(reply_parts)
+            print(f"LLM Response: {llm_response}")
+            
+            # Update History
+            context["history"].append({"role": "user", "parts": [user_text]})
+            context["history"].append({"role": "model", "parts": [llm_response]})
+            if chat is not None:
+                chat_sessions.save_chat(call_sid, context, chat, sent, summary)
+        finally:
+            sentences.put_nowait(None)
+
+    producer = asyncio.create_task(produce())
+    try:
+        while True:
+            queue = await sentences.get()
+            if queue is None:
+                break
+            while True:
+                chunk = await queue.get()
+                if chunk is None:
+                    break
+                if isinstance(chunk, Exception):
+                    raise chunk
+                yield chunk
+        await producer
+    finally:
+        for task in [producer, *pumps]:
+            if not task.done():
+                task.cancel()
@@ -0,0 +1,97 @@
+from app.config import HISTORY_MAX_TURNS, HISTORY_TOKEN_BUDGET
+from app.services.llm import run_llm, FALLBACK_REPLY
+
+SUMMARY_INSTRUCTION = (
+    "You maintain a running summary of a phone conversation between a caller and an assistant. "
+    "Keep names, numbers, requests and anything still unresolved. Reply with the summary only, "
+    "in under 120 words."
+)
+
+def estimate_tokens(text: str) -> int:
+    # Rough estimate (~4 characters per token); good enough for budgeting
+    return len(text) // 4 + 1
+
+def message_text(message: dict) -> str:
+    return " ".join(str(part) for part in message["parts"])
+
+def _window_start(history: list) -> int:
+    """
+    Index of the oldest message kept verbatim: whole user/model exchanges,
+    newest first, up to HISTORY_MAX_TURNS and HISTORY_TOKEN_BUDGET.
+    """
+    start = len(history) - len(history) % 2
+    tokens = 0
+    while start >= 2 and (len(history) - start) < HISTORY_MAX_TURNS * 2:
+        pair = estimate_tokens(message_text(history[start - 2])) + estimate_tokens(message_text(history[start - 1]))
+        if tokens and tokens + pair > HISTORY_TOKEN_BUDGET:
+            break
+        tokens += pair
+        start -= 2
+    return start
+
+def prompt_history(context: dict) -> list:
+    """
+    Returns the history to send with the next prompt: the running summary
+    (if any) followed by the most recent turns verbatim.
+    """
+    history = context["history"]
+    recent = history[_window_start(history):]
+    summary = context.get("summary")
+    if not summary:
+        return recent
+    return [
+        {"role": "user", "parts": [f"Summary of our conversation so far: {summary}"]},
+        {"role": "model", "parts": ["Understood."]},
+        *recent,
+    ]
+
+async def fold_history(context: dict) -> list:
+    """
+    Folds turns that have fallen out of the verbatim window into
+    context["summary"] and drops them from context["history"].
+    Meant to run alongside the turn's generation, off its critical path.
+    Turns waiting for the next batch are kept but no longer sent.
+    Returns the messages that were dropped (empty if nothing was folded).
+    """
+    history = context["history"]
+    folded = _window_start(history)
+    # Fold in batches of a few turns, so the summary (and any live chat
+    # session seeded from it) doesn't change on every turn
+    if folded < max(HISTORY_MAX_TURNS, 2):
+        return []
+
+    transcript = "\n".join(
+        f"{'Caller' if message['role'] == 'user' else 'Assistant'}: {message_text(message)}"
+        for message in history[:folded]
+    )
+    prompt = f"Summary so far:\n{context.get('summary') or '(none)'}\n\nNew turns:\n{transcript}"
+    summary = await run_llm(prompt, system_instruction=SUMMARY_INSTRUCTION)
+    if summary == FALLBACK_REPLY:
+        # Keep the turns; the next turn retries
+        return []
+
+    context["summary"] = summary.strip()
+    # Only the front is dropped; turns appended meanwhile are untouched
+    dropped = history[:folded]
+    del history[:folded]
+    return dropped
+
+async def store_summary(store, call_sid: str, context: dict, folds: list):
+    """
+    Awaits the fold_history() tasks in `folds` and writes their result to the
+    call's stored state. Only the summary and the folded front of the history
+    are changed, and only while the stored history still starts with the
+    folded turns, so a turn (or fold) saved meanwhile isn't overwritten.
+    """
+    for folding in folds:
+        try:
+            dropped = await folding
+        except Exception as e:
+            print(f"Error folding history: {e!r}")
+            continue
+        if not dropped:
+            continue
+        async with store.update(call_sid, create=False) as state:
+            if state is not None and state["history"][:len(dropped)] == dropped:
+                state["summary"] = context["summary"]
+                del state["history"][:len(dropped)]
@@ -1,27 +1,176 @@
-import google.generativeai as genai
-from app.config import GEMINI_API_KEY, GEMINI_MODEL
+import asyncio
+import time
+from datetime import timedelta
+from functools import lru_cache
+from typing import TYPE_CHECKING
+from app.config import (
+    GEMINI_API_KEY,
+    GEMINI_MODEL,
+    GEMINI_SYSTEM_PROMPT,
+    GEMINI_CONTEXT_CACHE,
+    GEMINI_CACHE_TTL,
+    LLM_TIMEOUT,
+)
+from app.services import registry
+from app.utils.timing import timed
 
-# Configure Gemini
-genai.configure(api_key=GEMINI_API_KEY)
+if TYPE_CHECKING:
+    import google.generativeai as genai
 
-async def run_llm(prompt: str, history: list = None) -> str:
+def _build_genai():
+    # google.generativeai pulls in grpc and the API client; import it on first use
+    import google.generativeai as genai
+    genai.configure(api_key=GEMINI_API_KEY)
+    return genai
+
+registry.register("gemini", _build_genai)
+
+FALLBACK_REPLY = "I'm sorry, I couldn't process that."
+
+@lru_cache(maxsize=16)
+def get_model(model_name: str = GEMINI_MODEL, system_instruction: str | None = GEMINI_SYSTEM_PROMPT) -> "genai.GenerativeModel":
+    """
+    Returns a cached GenerativeModel for the given model name and system instruction.
+    Models are stateless, so one instance is shared by every call.
+    """
+    return registry.get("gemini").GenerativeModel(model_name, system_instruction=system_instruction)
+
+# Model bound to the cached system prompt, refreshed before the cache expires
+_chat_model = None
+_chat_model_until = 0.0
+_chat_model_lock = asyncio.Lock()
+
+async def get_chat_model() -> "genai.GenerativeModel":
+    """
+    Returns the model used for caller conversations. With GEMINI_CONTEXT_CACHE,
+    the system prompt is uploaded once as cached content and shared by every
+    call, instead of being sent (and billed) with each turn.
+    """
+    global _chat_model, _chat_model_until
+    if not (GEMINI_CONTEXT_CACHE and GEMINI_SYSTEM_PROMPT):
+        return get_model()
+    if _chat_model is not None and time.monotonic() < _chat_model_until:
+        return _chat_model
+
+    async with _chat_model_lock:
+        if _chat_model is not None and time.monotonic() < _chat_model_until:
+            return _chat_model
+        try:
+            genai = registry.get("gemini")
+            from google.generativeai import caching
+            cached = await asyncio.to_thread(
+                caching.CachedContent.create,
+                model=f"models/{GEMINI_MODEL}",
+                system_instruction=GEMINI_SYSTEM_PROMPT,
+                ttl=timedelta(seconds=GEMINI_CACHE_TTL),
+            )
+            _chat_model = genai.GenerativeModel.from_cached_content(cached)
+            # Leave a margin so no turn races the server-side expiry
+            _chat_model_until = time.monotonic() + GEMINI_CACHE_TTL * 0.9
+        except Exception as e:
+            # E.g. prompt below the minimum cacheable size; don't retry every turn
+            print(f"Error creating Gemini context cache: {e!r}")
+            _chat_model = get_model()
+            _chat_model_until = time.monotonic() + GEMINI_CACHE_TTL
+        return _chat_model
+
+async def start_chat(history: list) -> "genai.ChatSession":
+    """
+    Starts a chat session seeded with `history` (Gemini history format).
+    The history is converted and validated here, once.
+    """
+    model = await get_chat_model()
+    return model.start_chat(history=history)
+
+async def warm_connection():
+    """
+    Establishes the Gemini channel with a cheap token-count call, so the first
+    generation of a call doesn't pay for connection setup.
+    """
+    try:
+        await asyncio.wait_for(get_model().count_tokens_async("ping"), timeout=LLM_TIMEOUT)
+    except Exception as e:
+        print(f"Gemini warm-up failed: {e!r}")
+
+@timed("llm", outcome=lambda text: "fallback" if text == FALLBACK_REPLY else "ok")
+async def run_llm(
+    prompt: str,
+    history: list = None,
+    model_name: str = GEMINI_MODEL,
+    system_instruction: str | None = GEMINI_SYSTEM_PROMPT,
+    timeout: float = LLM_TIMEOUT,
+) -> str:
     """
     Sends a prompt to Gemini and returns the response text.
-    Supports conversation history.
+    Supports conversation history. Gives up after `timeout` seconds.
     """
     try:
-        model = genai.GenerativeModel(GEMINI_MODEL)
+        model = get_model(model_name, system_instruction)
+        request_options = {"timeout": timeout}
         
         if history:
             # Convert history to Gemini format
             # History format: [{"role": "user", "parts": ["..."]}, {"role": "model", "parts": ["..."]}]
             chat = model.start_chat(history=history)
-            response = chat.send_message(prompt)
+            call = chat.send_message_async(prompt, request_options=request_options)
         else:
-            response = model.generate_content(prompt)
+            call = model.generate_content_async(prompt, request_options=request_options)
             
+        response = await asyncio.wait_for(call, timeout=timeout)
         return response.text
+    except asyncio.TimeoutError:
+        print(f"run_llm timed out after {timeout}s")
+        return FALLBACK_REPLY
     except Exception as e:
         print(f"Error in run_llm: {e}")
         # Fallback or re-raise
-        return "I'm sorry, I couldn't process that."
+        return FALLBACK_REPLY
+
+@timed("llm_stream", outcome=lambda text: "fallback" if text == FALLBACK_REPLY else "ok")
+async def stream_llm(
+    prompt: str,
+    history: list = None,
+    chat: "genai.ChatSession | None" = None,
+    model_name: str = GEMINI_MODEL,
+    system_instruction: str | None = GEMINI_SYSTEM_PROMPT,
+    timeout: float = LLM_TIMEOUT,
+):
+    """
+    Streams the Gemini response, yielding text chunks as they are generated.
+    Continues `chat` if given (the session records the exchange itself),
+    otherwise starts from `history`.
+    `timeout` bounds the whole response. Yields the fallback reply if the call
+    fails before producing any text.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    produced = False
+    try:
+        model = get_model(model_name, system_instruction)
+        request_options = {"timeout": timeout}
+        
+        if chat is None and history:
+            chat = model.start_chat(history=history)
+        if chat is not None:
+            call = chat.send_message_async(prompt, stream=True, request_options=request_options)
+        else:
+            call = model.generate_content_async(prompt, stream=True, request_options=request_options)
+            
+        response = await asyncio.wait_for(call, timeout=timeout)
+        chunks = response.__aiter__()
+        while True:
+            try:
+                chunk = await asyncio.wait_for(chunks.__anext__(), timeout=max(deadline - loop.time(), 0))
+            except StopAsyncIteration:
+                break
+            if chunk.text:
+                produced = True
+                yield chunk.text
+    except asyncio.TimeoutError:
+        print(f"stream_llm timed out after {timeout}s")
+        if not produced:
+            yield FALLBACK_REPLY
+    except Exception as e:
+        print(f"Error in stream_llm: {e}")
+        if not produced:
+            yield FALLBACK_REPLY
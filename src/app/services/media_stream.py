@@ -0,0 +1,158 @@
+import asyncio
+import base64
+import json
+from fastapi import WebSocket
+
+from app.services.speech_to_text import StreamingTranscriber
+from app.services.conversation import speak_reply
+from app.services.history import store_summary
+from app.services.call_state import CallStateStore
+from app.utils.audio import (
+    mulaw_to_pcm16,
+    pcm16_to_mulaw,
+    wav_to_pcm16,
+    wav_codec,
+    strip_wav_header,
+    resample_pcm16,
+)
+
+# Twilio Media Streams always carry 8 kHz mono μ-law
+TWILIO_SAMPLE_RATE = 8000
+# Size of each outbound media message (400 ms of μ-law audio)
+OUTBOUND_CHUNK_BYTES = 3200
+
+class MediaStreamSession:
+    """
+    One Twilio Media Streams connection.
+
+    Inbound μ-law frames are decoded and forwarded to a streaming Sarvam STT
+    socket as they arrive, so transcription runs while the caller talks and
+    the turn is finalized on Sarvam's VAD end-of-speech event. Each turn then
+    runs LLM -> translate -> TTS and the reply is sent back as μ-law media
+    messages on the same connection.
+    """
+
+    def __init__(self, websocket: WebSocket, store: CallStateStore):
+        self.websocket = websocket
+        self.store = store
+        self.call_sid = None
+        self.stream_sid = None
+        self.context = None
+        self._send_lock = asyncio.Lock()
+        self._clip_count = 0
+        self._playing = False
+
+    async def run(self):
+        """
+        Reads Twilio events until the stream stops or the socket closes.
+        """
+        messages = self.websocket.iter_text()
+        
+        # Wait for the start event, which tells us which call this is
+        async for raw in messages:
+            message = json.loads(raw)
+            if message.get("event") == "start":
+                if not await self._on_start(message):
+                    return
+                break
+        else:
+            return
+
+        async with StreamingTranscriber(sample_rate=TWILIO_SAMPLE_RATE, on_speech_start=self._on_speech_start) as stt:
+            turns = asyncio.create_task(self._consume_turns(stt))
+            try:
+                async for raw in messages:
+                    message = json.loads(raw)
+                    event = message.get("event")
+                    
+                    if event == "media":
+                        media = message["media"]
+                        if media.get("track", "inbound") == "inbound":
+                            await stt.send_audio(mulaw_to_pcm16(base64.b64decode(media["payload"])))
+                    elif event == "mark":
+                        self._on_mark(message.get("mark", {}))
+                    elif event == "stop":
+                        print(f"Media stream stopped: {self.call_sid}")
+                        break
+            finally:
+                turns.cancel()
+
+    async def _on_start(self, message: dict) -> bool:
+        start = message.get("start", {})
+        self.stream_sid = start.get("streamSid") or message.get("streamSid")
+        self.call_sid = start.get("callSid")
+        self.context = await self.store.get(self.call_sid)
+        print(f"Media stream started: {self.call_sid} ({self.stream_sid})")
+
+        if not self.context or not self.context["authenticated"]:
+            print(f"Rejecting media stream for unauthenticated call: {self.call_sid}")
+            await self.websocket.close()
+            return False
+        return True
+
+    def _on_mark(self, mark: dict):
+        # Twilio echoes our mark once everything before it has been played
+        if mark.get("name") == f"clip-{self._clip_count}":
+            self._playing = False
+
+    async def _on_speech_start(self):
+        # Barge-in: drop whatever reply audio Twilio still has buffered
+        if self._playing:
+            await self._send({"event": "clear", "streamSid": self.stream_sid})
+            self._playing = False
+
+    async def _consume_turns(self, stt: StreamingTranscriber):
+        # Turns run in order so history stays consistent
+        while True:
+            turn = await stt.next_turn()
+            if turn is None:
+                return
+            await self._run_turn(*turn)
+
+    async def _run_turn(self, user_text: str, detected_lang: str):
+        print(f"Transcript: {user_text}, Detected Lang: {detected_lang}")
+        try:
+            # TTS is streamed as 8 kHz μ-law, so each chunk goes out as soon as it is generated
+            folds = []
+            async for mulaw in speak_reply(
+                self.context, user_text, detected_lang,
+                sample_rate=TWILIO_SAMPLE_RATE, stream_audio=True, call_sid=self.call_sid, codec="mulaw",
+                folds=folds,
+            ):
+                await self.play_mulaw(mulaw)
+            await self.store.merge(self.call_sid, history=self.context["history"], summary=self.context.get("summary", ""))
+            # The reply is already with Twilio; the summary finishes while it plays
+            await store_summary(self.store, self.call_sid, self.context, folds)
+        except Exception as e:
+            print(f"Error in media stream turn: {e!r}")
+
+    async def play_wav(self, wav_bytes: bytes):
+        """
+        Sends a WAV clip down the stream as μ-law media messages.
+        """
+        if wav_codec(wav_bytes) == "mulaw":
+            await self.play_mulaw(strip_wav_header(wav_bytes))
+            return
+        pcm, sample_rate = wav_to_pcm16(wav_bytes)
+        await self.play_pcm(resample_pcm16(pcm, sample_rate, TWILIO_SAMPLE_RATE))
+
+    async def play_pcm(self, pcm: bytes):
+        """
+        Sends 8 kHz 16-bit PCM down the stream, followed by a mark.
+        """
+        await self.play_mulaw(pcm16_to_mulaw(pcm))
+
+    async def play_mulaw(self, mulaw: bytes):
+        """
+        Sends 8 kHz μ-law audio down the stream, followed by a mark.
+        """
+        self._playing = True
+        for offset in range(0, len(mulaw), OUTBOUND_CHUNK_BYTES):
+            payload = base64.b64encode(mulaw[offset:offset + OUTBOUND_CHUNK_BYTES]).decode("ascii")
+            await self._send({"event": "media", "streamSid": self.stream_sid, "media": {"payload": payload}})
+        self._clip_count += 1
+        await self._send({"event": "mark", "streamSid": self.stream_sid, "mark": {"name": f"clip-{self._clip_count}"}})
+
+    async def _send(self, message: dict):
+        async with self._send_lock:
+            await self.websocket.send_text(json.dumps(message))
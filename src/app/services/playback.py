@@ -0,0 +1,110 @@
+import asyncio
+import time
+import uuid
+from app.utils.audio import wav_header, wav_stream_header
+
+class AudioStream:
+    """
+    Reply audio that grows while it is being synthesized.
+
+    The producer appends raw audio chunks (16-bit PCM, or 8-bit μ-law with
+    codec="mulaw") as TTS generates them and calls
+    close() when the reply is complete. Any number of readers can stream it as
+    a WAV file at the same time: they get everything written so far, then wait
+    for new chunks until the stream is closed.
+    """
+
+    def __init__(self, sample_rate: int, codec: str = "linear16"):
+        # Distinguishes this reply from the call's earlier ones in /twilio/audio URLs
+        self.id = uuid.uuid4().hex[:12]
+        self.sample_rate = sample_rate
+        self.codec = codec
+        self.chunks = []
+        self.nbytes = 0
+        self.closed = False
+        self.updated_at = time.monotonic()
+        self._changed = asyncio.Condition()
+
+    async def append(self, pcm: bytes):
+        async with self._changed:
+            self.chunks.append(pcm)
+            self.nbytes += len(pcm)
+            self.updated_at = time.monotonic()
+            self._changed.notify_all()
+
+    async def close(self):
+        async with self._changed:
+            self.closed = True
+            self.updated_at = time.monotonic()
+            self._changed.notify_all()
+
+    def wav_bytes(self) -> bytes:
+        """
+        The audio written so far as a complete WAV file.
+        """
+        return wav_header(self.sample_rate, self.nbytes, codec=self.codec) + b"".join(self.chunks)
+
+    async def iter_wav(self):
+        """
+        Yields a streaming WAV header followed by audio chunks as they arrive.
+        """
+        yield wav_stream_header(self.sample_rate, codec=self.codec)
+        sent = 0
+        while True:
+            async with self._changed:
+                await self._changed.wait_for(lambda: sent < len(self.chunks) or self.closed)
+                pending = self.chunks[sent:]
+                finished = self.closed
+            for chunk in pending:
+                yield chunk
+            sent += len(pending)
+            if finished and sent == len(self.chunks):
+                return
+
+async def render_to_stream(replies, stream: AudioStream, before_close=None, after_close=None):
+    """
+    Drains an async iterator of audio chunks into `stream`, closing it at the end.
+    `before_close` and `after_close` are optional coroutine functions awaited
+    just before and after closing.
+    """
+    try:
+        async for pcm in replies:
+            await stream.append(pcm)
+        if before_close:
+            await before_close()
+    except Exception as e:
+        print(f"Error rendering reply audio: {e!r}")
+    finally:
+        await stream.close()
+    if after_close:
+        try:
+            await after_close()
+        except Exception as e:
+            print(f"Error after rendering reply audio: {e!r}")
+
+# Reply audio per CallSid. Audio is process-local (it is streamed from memory
+# while it grows), so it is kept out of the serialized call state; finished
+# clips are also copied to the call-state store (see CallStateStore.put_clip).
+_streams = {}
+
+def set_stream(call_sid: str, stream: AudioStream):
+    _streams[call_sid] = stream
+
+def get_stream(call_sid: str) -> AudioStream | None:
+    return _streams.get(call_sid)
+
+def discard_stream(call_sid: str):
+    _streams.pop(call_sid, None)
+
+def expire_streams(max_idle: float) -> list:
+    """
+    Drops finished streams untouched for `max_idle` seconds. Returns their CallSids.
+    """
+    now = time.monotonic()
+    stale = [call_sid for call_sid, stream in _streams.items() if stream.closed and now - stream.updated_at > max_idle]
+    for call_sid in stale:
+        del _streams[call_sid]
+    return stale
+
+def resident_audio_bytes() -> int:
+    return sum(stream.nbytes for stream in _streams.values())
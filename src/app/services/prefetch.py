@@ -0,0 +1,106 @@
+import asyncio
+from app.config import PREFETCH_ENABLED, PREFETCH_TTL, IVR_LANGUAGE, CALL_STATE_MAX_CALLS, PIN_HASH_COLUMN
+from app.services import sarvam_client, recordings, llm
+from app.services.auth import lookup_caller, check_pin
+from app.services.conversation import translate_reply
+from app.services.text_to_speech import synthesize_telephony_audio
+from app.services.prompt_bank import PROMPTS
+from app.utils.cache import TTLCache
+
+# CallSid -> {"lookup": task resolving to the profile (or None),
+#             "greeting": task warming connections and resolving to the greeting audio (or None)}
+_slots = TTLCache(CALL_STATE_MAX_CALLS, PREFETCH_TTL)
+
+# Don't hold up the PIN check for a prefetch that is still running
+PREFETCH_WAIT = 1.0
+
+def greeting_text(user: dict) -> str:
+    return f"Hello {user['full_name']}. {PROMPTS['greeting']}"
+
+def start_prefetch(call_sid: str, caller: str | None):
+    """
+    Starts looking up the caller's profile by phone number while they type
+    their PIN. Also warms the vendor connections and pre-renders the
+    personalized greeting. Safe to call on every webhook of the call.
+    """
+    if not PREFETCH_ENABLED or not caller or call_sid in _slots:
+        return
+    # The PIN check only waits on the lookup, never on the warm-ups
+    lookup = asyncio.create_task(lookup_caller(caller))
+    _slots.set(call_sid, {"lookup": lookup, "greeting": asyncio.create_task(_prefetch(lookup))})
+
+async def _prefetch(lookup: asyncio.Task) -> bytes | None:
+    await asyncio.gather(
+        sarvam_client.warm_connection(),
+        recordings.warm_connection(),
+        llm.warm_connection(),
+    )
+    profile = await lookup
+    if not profile:
+        return None
+    try:
+        text = await translate_reply(greeting_text(profile), IVR_LANGUAGE)
+        return await synthesize_telephony_audio(text, IVR_LANGUAGE)
+    except Exception as e:
+        print(f"Error pre-rendering greeting: {e!r}")
+        return None
+
+def _same_user(profile: dict, user: dict) -> bool:
+    """
+    Whether `user` (as authenticated) is the prefetched profile.
+    """
+    if profile.get("id") is not None and user.get("id") is not None:
+        return profile["id"] == user["id"]
+    pin_column = PIN_HASH_COLUMN or "pin"
+    return {key: value for key, value in profile.items() if key != pin_column} == user
+
+def _done(task: asyncio.Task) -> bool:
+    return task.done() and not task.cancelled() and task.exception() is None
+
+async def _profile(call_sid: str) -> dict | None:
+    slot = _slots.get(call_sid)
+    if slot is None:
+        return None
+    try:
+        return await asyncio.wait_for(asyncio.shield(slot["lookup"]), timeout=PREFETCH_WAIT)
+    except asyncio.TimeoutError:
+        return None
+    except Exception as e:
+        print(f"Error in caller prefetch: {e!r}")
+        return None
+
+async def verify_prefetched_pin(call_sid: str, pin: str) -> dict | None:
+    """
+    Checks the PIN against the prefetched profile locally.
+    Returns the user on a match, or None if there is no prefetched profile or
+    the PIN doesn't match (callers then fall back to verify_user_pin).
+    """
+    profile = await _profile(call_sid)
+    if not profile:
+        return None
+    return check_pin(profile, pin)
+
+def prefetched_greeting(call_sid: str, user: dict | None) -> bytes | None:
+    """
+    The pre-rendered greeting audio for the call, if it is ready and was
+    rendered for `user`. A caller who authenticated with someone else's PIN
+    from this number must not hear the number owner's name.
+    """
+    slot = _slots.get(call_sid)
+    if slot is None or not user or not _done(slot["lookup"]) or not _done(slot["greeting"]):
+        return None
+    profile = slot["lookup"].result()
+    if not profile or not _same_user(profile, user):
+        return None
+    return slot["greeting"].result()
+
+def discard(call_sid: str):
+    slot = _slots.pop(call_sid)
+    if slot is None:
+        return
+    for task in slot.values():
+        if not task.done():
+            task.cancel()
+
+def expire() -> list:
+    return _slots.expire()
@@ -0,0 +1,99 @@
+import hashlib
+import json
+import os
+from functools import lru_cache
+
+from app.config import IVR_LANGUAGE
+
+# Fixed IVR phrases, in English. Rendered into every supported language at
+# build time by scripts/build_prompt_bank.py.
+PROMPTS = {
+    "welcome": "Welcome. Please enter your 4 digit PIN.",
+    "enter_pin": "Please enter your 4 digit PIN.",
+    "invalid_pin": "Invalid PIN. Please try again.",
+    "greeting": "How can I help you today?",
+    "could_not_hear": "Sorry, I could not hear you.",
+    "one_moment": "One moment please.",
+    "error": "Sorry, an error occurred.",
+}
+
+SUPPORTED_LANGUAGES = ["en-IN", "hi-IN", "bn-IN", "gu-IN", "kn-IN", "ml-IN", "mr-IN", "od-IN", "pa-IN", "ta-IN", "te-IN"]
+
+PROMPT_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "static", "prompts")
+MANIFEST_PATH = os.path.join(PROMPT_DIR, "manifest.json")
+
+def prompt_path(language: str, phrase: str) -> str:
+    return os.path.join(PROMPT_DIR, language, f"{phrase}.wav")
+
+@lru_cache(maxsize=1)
+def load_manifest() -> dict:
+    """
+    Returns {language: {phrase: {"text": ..., "version": ...}}} for the built bank.
+    """
+    try:
+        with open(MANIFEST_PATH, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+def prompt_url(request, phrase: str, language: str | None = None) -> str | None:
+    """
+    URL of a pre-rendered prompt, or None if it wasn't built for the language.
+    The content version in the query string lets clients cache it forever.
+    """
+    language = language or IVR_LANGUAGE
+    entry = load_manifest().get(language, {}).get(phrase)
+    if not entry:
+        return None
+    base_url = str(request.base_url).rstrip('/')
+    return f"{base_url}/twilio/prompts/{language}/{phrase}.wav?v={entry['version']}"
+
+def play_prompt(verb, request, phrase: str, language: str | None = None):
+    """
+    Appends a fixed phrase to a TwiML verb (VoiceResponse or Gather): a <Play>
+    of the pre-rendered audio when available, otherwise an English <Say>.
+    """
+    url = prompt_url(request, phrase, language)
+    if url:
+        verb.play(url)
+    else:
+        verb.say(PROMPTS[phrase])
+
+async def build_prompt_bank(languages: list[str] = SUPPORTED_LANGUAGES, force: bool = False) -> dict:
+    """
+    Translates and synthesizes every prompt in every language into PROMPT_DIR
+    and writes the manifest. Existing clips whose source text is unchanged are
+    kept unless `force` is set. Returns the manifest.
+    """
+    from app.services.conversation import translate_reply
+    from app.services.text_to_speech import synthesize_telephony_audio
+
+    manifest = {} if force else dict(load_manifest())
+    for language in languages:
+        entries = manifest.setdefault(language, {})
+        for phrase, text in PROMPTS.items():
+            path = prompt_path(language, phrase)
+            entry = entries.get(phrase)
+            if entry and entry.get("source") == text and os.path.exists(path):
+                continue
+
+            localized = await translate_reply(text, language)
+            if language != "en-IN" and localized == text:
+                print(f"Warning: {phrase} was not translated to {language}")
+            audio = await synthesize_telephony_audio(localized, language)
+
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(audio)
+            entries[phrase] = {
+                "source": text,
+                "text": localized,
+                "version": hashlib.sha256(audio).hexdigest()[:12],
+            }
+            print(f"Rendered {language}/{phrase}: {localized}")
+
+    os.makedirs(PROMPT_DIR, exist_ok=True)
+    with open(MANIFEST_PATH, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    load_manifest.cache_clear()
+    return manifest
@@ -0,0 +1,84 @@
+import asyncio
+import httpx
+from urllib.parse import urlsplit
+from app.config import (
+    TWILIO_ACCOUNT_SID,
+    TWILIO_AUTH_TOKEN,
+    RECORDING_MAX_CONNECTIONS,
+    RECORDING_MAX_PER_HOST,
+    RECORDING_TIMEOUT,
+    RECORDING_RETRIES,
+    RECORDING_RETRY_BACKOFF,
+)
+from app.services import registry
+from app.utils.timing import timed
+
+def _build_http_client() -> httpx.AsyncClient:
+    # Keep-alive pool for Twilio recording downloads. Reusing connections avoids
+    # a fresh TLS handshake to api.twilio.com on every turn.
+    return httpx.AsyncClient(
+        auth=(TWILIO_ACCOUNT_SID or "", TWILIO_AUTH_TOKEN or ""),
+        limits=httpx.Limits(
+            max_connections=RECORDING_MAX_CONNECTIONS,
+            max_keepalive_connections=RECORDING_MAX_CONNECTIONS,
+        ),
+        timeout=httpx.Timeout(RECORDING_TIMEOUT, connect=3.0),
+        follow_redirects=True,
+    )
+
+registry.register("twilio_http", _build_http_client, close=lambda http_client: http_client.aclose())
+
+# Per-host concurrency slots (httpx only limits the pool as a whole)
+_host_slots = {}
+
+def _host_slot(url: str) -> asyncio.Semaphore:
+    host = urlsplit(url).netloc
+    if host not in _host_slots:
+        _host_slots[host] = asyncio.Semaphore(RECORDING_MAX_PER_HOST)
+    return _host_slots[host]
+
+@timed("download", outcome=lambda audio: "ok" if audio else "failed")
+async def download_recording(recording_url: str) -> bytes | None:
+    """
+    Downloads a Twilio recording and returns the audio bytes.
+
+    The recording callback can arrive before the media is available, in which
+    case Twilio answers 404 for a short while. 404s, 5xx and transport errors
+    are retried with exponential backoff; other statuses fail immediately.
+    Returns None if the recording could not be fetched.
+    """
+    delay = RECORDING_RETRY_BACKOFF
+    for attempt in range(RECORDING_RETRIES + 1):
+        try:
+            async with _host_slot(recording_url):
+                async with registry.get("twilio_http").stream("GET", recording_url) as response:
+                    if response.status_code == 200:
+                        # Stream the body straight into one buffer for the STT stage
+                        buffer = bytearray()
+                        async for chunk in response.aiter_bytes():
+                            buffer.extend(chunk)
+                        return bytes(buffer)
+
+                    retryable = response.status_code == 404 or response.status_code >= 500
+                    print(f"Recording download returned {response.status_code} (attempt {attempt + 1})")
+                    if not retryable:
+                        return None
+        except httpx.TransportError as e:
+            print(f"Recording download failed (attempt {attempt + 1}): {e!r}")
+
+        if attempt < RECORDING_RETRIES:
+            await asyncio.sleep(delay)
+            delay *= 2
+
+    return None
+
+async def warm_connection():
+    """
+    Opens a pooled connection to the Twilio API before the first recording
+    download of a call.
+    """
+    try:
+        await registry.get("twilio_http").head("https://api.twilio.com", timeout=3.0)
+    except httpx.HTTPError as e:
+        print(f"Twilio warm-up failed: {e!r}")
+
@@ -0,0 +1,72 @@
+import asyncio
+import inspect
+import time
+
+# Process-wide vendor clients, built on first use rather than at import time,
+# so importing the app (the Lambda init phase) doesn't pay for SDK imports and
+# client setup that the first webhook may never need.
+# Name -> (factory, close); either may be a coroutine function
+_factories = {}
+_instances = {}
+_locks = {}
+
+def register(name: str, factory, close=None):
+    """
+    Registers how to build (and optionally close) the client called `name`.
+    """
+    _factories[name] = (factory, close)
+
+def _built(name: str, instance, started: float):
+    _instances[name] = instance
+    print(f"Initialized {name} in {(time.perf_counter() - started) * 1000:.0f} ms")
+    return instance
+
+def get(name: str):
+    """
+    Returns the client called `name`, building it on first use.
+    """
+    if name not in _instances:
+        factory, _ = _factories[name]
+        started = time.perf_counter()
+        _built(name, factory(), started)
+    return _instances[name]
+
+async def aget(name: str):
+    """
+    Like get(), for clients whose factory is a coroutine function. Concurrent
+    first callers share one build.
+    """
+    if name in _instances:
+        return _instances[name]
+    lock = _locks.setdefault(name, asyncio.Lock())
+    async with lock:
+        if name not in _instances:
+            factory, _ = _factories[name]
+            started = time.perf_counter()
+            instance = factory()
+            if inspect.isawaitable(instance):
+                instance = await instance
+            _built(name, instance, started)
+    return _instances[name]
+
+def registered() -> list[str]:
+    return list(_factories)
+
+def is_built(name: str) -> bool:
+    return name in _instances
+
+async def close_all():
+    """
+    Closes every client that was built, newest first. Called on shutdown.
+    """
+    for name in reversed(list(_instances)):
+        _, close = _factories[name]
+        instance = _instances.pop(name)
+        if close is None:
+            continue
+        try:
+            result = close(instance)
+            if inspect.isawaitable(result):
+                await result
+        except Exception as e:
+            print(f"Error closing {name}: {e!r}")
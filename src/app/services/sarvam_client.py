@@ -0,0 +1,49 @@
+import httpx
+from app.config import (
+    SARVAM_API_KEY,
+    SARVAM_MAX_CONNECTIONS,
+    SARVAM_MAX_KEEPALIVE,
+    SARVAM_KEEPALIVE_EXPIRY,
+    SARVAM_TIMEOUT,
+)
+from app.services import registry
+
+SARVAM_BASE_URL = "https://api.sarvam.ai"
+
+def _build_http_client() -> httpx.AsyncClient:
+    # One pooled HTTP transport shared by STT, translation and TTS.
+    # Connections are kept alive between turns so we don't pay a TLS handshake
+    # per vendor call, and the pool size bounds how many Sarvam requests a single
+    # worker keeps in flight at once.
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=SARVAM_MAX_CONNECTIONS,
+            max_keepalive_connections=SARVAM_MAX_KEEPALIVE,
+            keepalive_expiry=SARVAM_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(SARVAM_TIMEOUT, connect=5.0),
+        follow_redirects=True,
+    )
+
+def _build_client():
+    from sarvamai import AsyncSarvamAI
+    return AsyncSarvamAI(api_subscription_key=SARVAM_API_KEY, httpx_client=registry.get("sarvam_http"))
+
+registry.register("sarvam_http", _build_http_client, close=lambda http_client: http_client.aclose())
+registry.register("sarvam", _build_client)
+
+def get_client():
+    """
+    Returns the process-wide async Sarvam client, created on first use.
+    """
+    return registry.get("sarvam")
+
+async def warm_connection():
+    """
+    Opens a pooled connection to Sarvam ahead of the first real request,
+    so the TLS handshake is off the critical path.
+    """
+    try:
+        await registry.get("sarvam_http").head(SARVAM_BASE_URL, timeout=3.0)
+    except httpx.HTTPError as e:
+        print(f"Sarvam warm-up failed: {e!r}")
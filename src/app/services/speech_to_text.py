@@ -1,21 +1,50 @@
-from sarvamai import SarvamAI
-from app.config import SARVAM_API_KEY
+from collections import Counter
+from app.services.sarvam_client import get_client
+from app.config import STT_STREAMING_LANGUAGE, STT_FLUSH_TIMEOUT, STT_MAX_SECONDS, STT_CHUNK_OVERLAP
+from app.utils.audio import wav_to_pcm16, pcm16_to_wav, split_at_pauses
+from app.utils.text import merge_transcripts
+from app.utils.timing import timed
+import asyncio
+import base64
 import io
 
-# Initialize Sarvam Client
-client = SarvamAI(api_subscription_key=SARVAM_API_KEY)
-
+@timed("stt", language=lambda result: result[1], outcome=lambda result: "ok" if (result[0] or "").strip() else "empty")
 async def speech_to_english(audio_bytes: bytes) -> tuple[str, str]:
     """
     Transcribes audio bytes to English text using Sarvam AI (Saarika/Saaras).
     Returns a tuple of (transcript, detected_language_code).
+    Recordings longer than STT_MAX_SECONDS are split at pauses and the
+    segments transcribed concurrently.
     """
+    try:
+        pcm, sample_rate = wav_to_pcm16(audio_bytes)
+    except Exception:
+        # Not a PCM WAV we can split; let the API take it as is
+        return await _transcribe(audio_bytes)
+
+    if len(pcm) <= STT_MAX_SECONDS * sample_rate * 2:
+        return await _transcribe(audio_bytes)
+
+    segments = split_at_pauses(pcm, sample_rate, STT_MAX_SECONDS, STT_CHUNK_OVERLAP)
+    print(f"Transcribing {len(pcm) / (2 * sample_rate):.1f}s recording in {len(segments)} segments")
+    results = await asyncio.gather(*[
+        _transcribe(pcm16_to_wav(pcm[start:end], sample_rate)) for start, end in segments
+    ])
+    transcript = merge_transcripts([text or "" for text, _ in results])
+    # The language most segments were heard in, weighted by how much was said
+    languages = Counter()
+    for text, language_code in results:
+        languages[language_code] += len(text or "")
+    return transcript, languages.most_common(1)[0][0]
+
+@timed("stt_request", language=lambda result: result[1])
+async def _transcribe(audio_bytes: bytes) -> tuple[str, str]:
     try:
         # Create a file-like object from bytes
         audio_file = io.BytesIO(audio_bytes)
         audio_file.name = "audio.wav" 
 
-        response = client.speech_to_text.transcribe(
+        response = await get_client().speech_to_text.transcribe(
             file=audio_file,
             model="saarika:v2.5", 
         )
@@ -40,3 +69,125 @@ async def speech_to_english(audio_bytes: bytes) -> tuple[str, str]:
     except Exception as e:
         print(f"Error in speech_to_english: {e}")
         raise e
+
+class StreamingTranscriber:
+    """
+    Live transcription over the Sarvam speech_to_text_streaming socket.
+
+    Raw 16-bit PCM is pushed with send_audio() while the caller talks, so
+    transcription runs as audio arrives. With vad_signals on, Sarvam reports
+    START_SPEECH / END_SPEECH; on END_SPEECH we send a flush so the tail of the
+    utterance is finalized, and the collected transcript is delivered as one
+    turn through next_turn().
+
+    Usage:
+        async with StreamingTranscriber(sample_rate=8000) as stt:
+            await stt.send_audio(pcm)
+            transcript, language_code = await stt.next_turn()
+    """
+
+    def __init__(self, sample_rate: int = 8000, language_code: str = STT_STREAMING_LANGUAGE, on_speech_start=None):
+        self.sample_rate = sample_rate
+        self.language_code = language_code
+        # Optional coroutine called when the caller starts talking (barge-in)
+        self.on_speech_start = on_speech_start
+        self._connection = None
+        self._socket = None
+        self._reader = None
+        self._turns = asyncio.Queue()
+        self._parts = []
+        self._language = None
+        self._ended = False
+        self._finalizer = None
+        # Batch 20 ms telephony frames into ~100 ms messages
+        self._pending = bytearray()
+        self._batch_bytes = sample_rate * 2 // 10
+
+    async def __aenter__(self):
+        self._connection = get_client().speech_to_text_streaming.connect(
+            language_code=self.language_code,
+            model="saarika:v2.5",
+            input_audio_codec="pcm_s16le",
+            sample_rate=str(self.sample_rate),
+            vad_signals="true",
+            flush_signal="true",
+        )
+        self._socket = await self._connection.__aenter__()
+        self._reader = asyncio.create_task(self._read())
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        for task in (self._reader, self._finalizer):
+            if task and not task.done():
+                task.cancel()
+        await self._connection.__aexit__(exc_type, exc, tb)
+
+    async def send_audio(self, pcm: bytes):
+        """
+        Queues 16-bit PCM at the connection sample rate for transcription.
+        """
+        self._pending.extend(pcm)
+        if len(self._pending) >= self._batch_bytes:
+            audio = base64.b64encode(bytes(self._pending)).decode("ascii")
+            self._pending.clear()
+            await self._socket.transcribe(audio=audio, encoding="audio/wav", sample_rate=self.sample_rate)
+
+    async def next_turn(self) -> tuple[str, str] | None:
+        """
+        Waits for the next finalized utterance.
+        Returns (transcript, language_code), or None once the socket has closed.
+        """
+        return await self._turns.get()
+
+    async def _read(self):
+        try:
+            async for message in self._socket:
+                if message.type == "events":
+                    await self._on_event(message.data)
+                elif message.type == "data":
+                    self._on_transcript(message.data)
+                elif message.type == "error":
+                    print(f"Streaming STT error: {message.data}")
+        except Exception as e:
+            print(f"Streaming STT socket closed: {e!r}")
+        finally:
+            self._turns.put_nowait(None)
+
+    async def _on_event(self, event):
+        signal = getattr(event, "signal_type", None)
+        if signal == "START_SPEECH":
+            if self.on_speech_start:
+                await self.on_speech_start()
+        elif signal == "END_SPEECH":
+            self._ended = True
+            # Push out buffered audio and ask the server to finalize now
+            if self._pending:
+                audio = base64.b64encode(bytes(self._pending)).decode("ascii")
+                self._pending.clear()
+                await self._socket.transcribe(audio=audio, encoding="audio/wav", sample_rate=self.sample_rate)
+            await self._socket.flush()
+            # If the flush yields no further transcript, finalize what we have
+            self._finalizer = asyncio.create_task(self._finalize_after(STT_FLUSH_TIMEOUT))
+
+    def _on_transcript(self, data):
+        transcript = getattr(data, "transcript", "") or ""
+        if transcript.strip():
+            self._parts.append(transcript.strip())
+        if getattr(data, "language_code", None):
+            self._language = data.language_code
+        if self._ended:
+            self._emit_turn()
+
+    async def _finalize_after(self, delay: float):
+        await asyncio.sleep(delay)
+        if self._ended:
+            self._emit_turn()
+
+    def _emit_turn(self):
+        if self._finalizer and self._finalizer is not asyncio.current_task():
+            self._finalizer.cancel()
+        self._finalizer = None
+        self._ended = False
+        if self._parts:
+            self._turns.put_nowait((" ".join(self._parts), self._language or "unknown"))
+        self._parts = []
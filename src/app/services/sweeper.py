@@ -0,0 +1,60 @@
+import asyncio
+from app.config import SWEEP_INTERVAL, AUDIO_IDLE_TTL
+from app.services.call_state import call_state
+from app.services import prefetch, chat_sessions, call_tasks
+from app.services.playback import discard_stream, expire_streams, resident_audio_bytes
+from app.utils.metrics import gauge
+
+# Calls with state resident in this process
+live_calls = gauge("voice_live_calls", "Calls handled by this process within the idle TTL", fn=call_state.active_calls)
+# Reply audio held in memory for /twilio/audio
+audio_bytes = gauge("voice_resident_audio_bytes", "Bytes of reply audio held in memory", fn=resident_audio_bytes)
+
+TERMINAL_STATUSES = {"completed", "busy", "failed", "no-answer", "canceled"}
+
+async def end_call(call_sid: str):
+    """
+    Frees everything held for a finished call. Reply renders and background
+    turns still running are cancelled first, so they can't write the call's
+    state back after it has been deleted.
+    """
+    call_tasks.cancel(call_sid)
+    await call_state.end_call(call_sid)
+    discard_stream(call_sid)
+    prefetch.discard(call_sid)
+    chat_sessions.discard(call_sid)
+
+async def sweep_once():
+    """
+    Evicts calls idle past the call-state TTL and reply audio idle past
+    AUDIO_IDLE_TTL (covers calls whose status callback never arrived).
+    """
+    expired = await call_state.expire()
+    for call_sid in expired:
+        discard_stream(call_sid)
+    stale = expire_streams(AUDIO_IDLE_TTL)
+    prefetch.expire()
+    chat_sessions.expire()
+    if expired or stale:
+        print(f"Sweeper evicted {len(expired)} call(s), {len(stale)} audio stream(s)")
+
+async def run_sweeper():
+    while True:
+        await asyncio.sleep(SWEEP_INTERVAL)
+        try:
+            await sweep_once()
+        except Exception as e:
+            print(f"Error in sweeper: {e!r}")
+
+_task = None
+
+def start_sweeper():
+    global _task
+    if _task is None:
+        _task = asyncio.create_task(run_sweeper())
+
+def stop_sweeper():
+    global _task
+    if _task is not None:
+        _task.cancel()
+        _task = None
@@ -1,24 +1,72 @@
-from sarvamai import SarvamAI
-from app.config import SARVAM_API_KEY
+from app.config import TTS_TELEPHONY_TRANSCODE
+from app.services.sarvam_client import get_client
+from app.services.tts_cache import tts_cache, cache_key
+from app.utils.audio import (
+    TELEPHONY_SAMPLE_RATE,
+    strip_wav_header,
+    pcm16_to_mulaw,
+    mulaw_to_wav,
+    wav_to_mulaw_wav,
+)
+from app.utils.timing import timed
 import base64
 
-client = SarvamAI(api_subscription_key=SARVAM_API_KEY)
+TTS_MODEL = "bulbul:v2"
+DEFAULT_SPEAKER = "anushka"
 
-async def synthesize_audio(text: str, target_language_code: str) -> bytes:
+async def synthesize_audio(
+    text: str,
+    target_language_code: str,
+    sample_rate: int | None = None,
+    codec: str = "wav",
+) -> bytes:
     """
     Converts text to speech using Sarvam AI (Bulbul).
-    Returns audio bytes (WAV/MP3).
+    Returns a WAV file. `sample_rate` overrides the Bulbul default; with
+    codec="mulaw" the WAV holds 8-bit μ-law instead of 16-bit PCM.
+    Served from the TTS cache when the same clip was synthesized before.
     """
+    if not tts_cache:
+        return await _synthesize(text, target_language_code, sample_rate, codec)
+    key = cache_key(text, target_language_code, DEFAULT_SPEAKER, TTS_MODEL, codec, sample_rate, "wav")
+    return await tts_cache.get_or_create(key, lambda: _synthesize(text, target_language_code, sample_rate, codec))
+
+async def synthesize_telephony_audio(text: str, target_language_code: str) -> bytes:
+    """
+    Synthesizes a clip in the phone network's own format (8 kHz μ-law WAV),
+    so Twilio plays it without transcoding and it is about a fifth of the
+    size of Bulbul's default output.
+    """
+    return await synthesize_audio(text, target_language_code, sample_rate=TELEPHONY_SAMPLE_RATE, codec="mulaw")
+
+async def _synthesize(text: str, target_language_code: str, sample_rate: int | None, codec: str) -> bytes:
+    if codec != "mulaw":
+        return await _convert(text, target_language_code, sample_rate)
+    if TTS_TELEPHONY_TRANSCODE == "local":
+        return wav_to_mulaw_wav(await _convert(text, target_language_code, TELEPHONY_SAMPLE_RATE))
+    audio = await _convert(text, target_language_code, TELEPHONY_SAMPLE_RATE, codec="mulaw")
+    # Raw μ-law samples still need a WAV header for <Play>
+    return audio if audio.startswith(b'RIFF') else mulaw_to_wav(audio)
+
+@timed("tts", language="target_language_code")
+async def _convert(text: str, target_language_code: str, sample_rate: int | None = None, codec: str | None = None) -> bytes:
     try:
         # Sarvam TTS API
         # Based on docs: client.text_to_speech.create(...)
         # Need to map language code to speaker if required, or let API handle it.
         # Bulbul supports various languages.
         
-        response = client.text_to_speech.convert(
+        options = {}
+        if sample_rate:
+            options["speech_sample_rate"] = sample_rate
+        if codec:
+            options["output_audio_codec"] = codec
+        
+        response = await get_client().text_to_speech.convert(
             text=text,
             target_language_code=target_language_code,
-            model="bulbul:v2" 
+            model=TTS_MODEL,
+            **options
         )
         
         # Response likely contains audio bytes or base64.
@@ -42,3 +90,71 @@ async def synthesize_audio(text: str, target_language_code: str) -> bytes:
     except Exception as e:
         print(f"Error in synthesize_audio: {e}")
         raise e
+
+async def synthesize_audio_stream(
+    text: str,
+    target_language_code: str,
+    sample_rate: int = 22050,
+    codec: str = "linear16",
+    speaker: str = DEFAULT_SPEAKER,
+):
+    """
+    Streams speech for `text` over the Sarvam text_to_speech_streaming socket,
+    yielding audio chunks as Bulbul generates them.
+
+    With the default "linear16" codec the chunks are raw 16-bit PCM at
+    `sample_rate`, ready to be appended to a streaming WAV. With "mulaw"
+    they are raw 8 kHz μ-law, as sent down the phone line. The text is flushed right away so the first chunk does not
+    wait for the server-side buffer to fill, and the stream ends on the
+    completion event. Cached clips are yielded as a single chunk.
+    """
+    if codec == "mulaw":
+        sample_rate = TELEPHONY_SAMPLE_RATE
+
+    def produce():
+        if codec == "mulaw" and TTS_TELEPHONY_TRANSCODE == "local":
+            return _encode_mulaw(_stream(text, target_language_code, sample_rate, "linear16", speaker))
+        return _stream(text, target_language_code, sample_rate, codec, speaker)
+
+    if not tts_cache:
+        async for chunk in produce():
+            yield chunk
+        return
+    key = cache_key(text, target_language_code, speaker, TTS_MODEL, codec, sample_rate, "raw")
+    async for chunk in tts_cache.stream(key, produce):
+        yield chunk
+
+@timed("tts_stream", language="target_language_code")
+async def _stream(text: str, target_language_code: str, sample_rate: int, codec: str, speaker: str):
+    try:
+        async with get_client().text_to_speech_streaming.connect(model=TTS_MODEL, send_completion_event="true") as socket:
+            await socket.configure(
+                target_language_code=target_language_code,
+                speaker=speaker,
+                speech_sample_rate=sample_rate,
+                output_audio_codec=codec,
+            )
+            await socket.convert(text)
+            await socket.flush()
+
+            async for message in socket:
+                if message.type == "audio":
+                    chunk = base64.b64decode(message.data.audio)
+                    if codec in ("linear16", "mulaw"):
+                        chunk = strip_wav_header(chunk)
+                    if chunk:
+                        yield chunk
+                elif message.type == "event":
+                    # "final" marks the end of audio for the flushed text
+                    if message.data.event_type == "final":
+                        break
+                elif message.type == "error":
+                    raise ValueError(f"TTS stream error: {message.data}")
+
+    except Exception as e:
+        print(f"Error in synthesize_audio_stream: {e}")
+        raise e
+
+async def _encode_mulaw(pcm_chunks):
+    async for pcm in pcm_chunks:
+        yield pcm16_to_mulaw(pcm)
@@ -1,30 +1,110 @@
-from sarvamai import SarvamAI
-from app.config import SARVAM_API_KEY
+import asyncio
+import json
+from app.services.sarvam_client import get_client
+from app.config import TRANSLATION_CACHE_SIZE, TRANSLATION_CACHE_TTL, TRANSLATION_WARM_FILE, TRANSLATION_WARM_CONCURRENCY
+from app.utils.cache import TTLCache
+from app.utils.metrics import counter, gauge
+from app.utils.text import normalize_text
+from app.utils.timing import timed
 
-client = SarvamAI(api_subscription_key=SARVAM_API_KEY)
+SOURCE_LANGUAGE = "en-IN" # Assuming reasoning is in English
+SPEAKER_GENDER = "Female" # Optional, but good for context if TTS follows
+
+# (normalized source, source lang, target lang, gender) -> translated text
+translation_cache = TTLCache(TRANSLATION_CACHE_SIZE, TRANSLATION_CACHE_TTL)
+
+gauge("voice_translation_cache_entries", "Entries in the translation cache", fn=lambda: len(translation_cache))
+counter("voice_translation_cache_hits_total", "Translation cache hits", fn=lambda: translation_cache.hits)
+counter("voice_translation_cache_misses_total", "Translation cache misses", fn=lambda: translation_cache.misses)
+counter("voice_translation_cache_evictions_total", "Translation cache LRU evictions", fn=lambda: translation_cache.evictions)
+counter("voice_translation_cache_expirations_total", "Translation cache TTL expirations", fn=lambda: translation_cache.expirations)
+
+def _cache_key(text: str, target_language: str) -> tuple:
+    return (normalize_text(text), SOURCE_LANGUAGE, target_language, SPEAKER_GENDER)
 
 async def translate_to_native(text: str, target_language: str) -> str:
     """
     Translates text from English (or auto) to the target language.
+    Repeated sentences are served from the translation cache.
     """
-    try:
-        # Sarvam Translate API
-        # Based on quickstart: response = client.text.translate(...)
-        response = client.text.translate(
-            input=text,
-            source_language_code="en-IN", # Assuming reasoning is in English
-            target_language_code=target_language,
-            speaker_gender="Female" # Optional, but good for context if TTS follows
-        )
-        
-        # Extract translated text
-        if hasattr(response, 'translated_text'):
-            return response.translated_text
-        elif isinstance(response, dict) and 'translated_text' in response:
-            return response['translated_text']
-        else:
-            return str(response)
+    key = _cache_key(text, target_language)
+    cached = translation_cache.get(key)
+    if cached is not None:
+        return cached
 
+    try:
+        translated = await _translate(key[0], target_language)
     except Exception as e:
         print(f"Error in translate_to_native: {e}")
-        return text # Fallback to original text
+        return text # Fallback to original text (not cached)
+
+    translation_cache.set(key, translated)
+    return translated
+
+@timed("translate", language="target_language")
+async def _translate(text: str, target_language: str) -> str:
+    # Sarvam Translate API
+    # Based on quickstart: response = await client.text.translate(...)
+    response = await get_client().text.translate(
+        input=text,
+        source_language_code=SOURCE_LANGUAGE,
+        target_language_code=target_language,
+        speaker_gender=SPEAKER_GENDER
+    )
+    
+    # Extract translated text
+    if hasattr(response, 'translated_text'):
+        return response.translated_text
+    elif isinstance(response, dict) and 'translated_text' in response:
+        return response['translated_text']
+    else:
+        return str(response)
+
+async def warm_translation_cache(path: str | None = TRANSLATION_WARM_FILE) -> int:
+    """
+    Preloads the most frequent reply sentences into the cache.
+
+    The file maps target languages to English sentences and their translation:
+        {"hi-IN": {"Is there anything else I can help you with?": "...", "Goodbye.": null}}
+    Provided translations are loaded as-is; null entries are translated now,
+    at most TRANSLATION_WARM_CONCURRENCY at a time.
+    Warm entries don't expire (they can still be evicted by LRU pressure).
+    Returns the number of entries loaded.
+    """
+    if not path:
+        return 0
+    try:
+        with open(path, encoding="utf-8") as f:
+            warm = json.load(f)
+    except FileNotFoundError:
+        print(f"Translation warm file not found: {path}")
+        return 0
+
+    pending = []
+    loaded = 0
+    for target_language, sentences in warm.items():
+        for source, translated in sentences.items():
+            key = _cache_key(source, target_language)
+            if translated:
+                translation_cache.set(key, translated, ttl=float("inf"))
+                loaded += 1
+            else:
+                pending.append(key)
+
+    # Runs alongside the first calls, so it must not take over the connection pool
+    slots = asyncio.Semaphore(max(TRANSLATION_WARM_CONCURRENCY, 1))
+
+    async def fetch(key):
+        try:
+            async with slots:
+                translated = await _translate(key[0], key[2])
+            translation_cache.set(key, translated, ttl=float("inf"))
+            return True
+        except Exception as e:
+            print(f"Error warming translation {key[:3]}: {e}")
+            return False
+
+    results = await asyncio.gather(*(fetch(key) for key in pending))
+    loaded += sum(results)
+    print(f"Translation cache warmed with {loaded} entries")
+    return loaded
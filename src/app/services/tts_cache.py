@@ -0,0 +1,194 @@
+import asyncio
+import hashlib
+import os
+from collections import OrderedDict
+
+from app.config import TTS_CACHE_ENABLED, TTS_CACHE_MEMORY_BYTES, TTS_CACHE_DIR, TTS_CACHE_DISK_BYTES
+from app.utils.metrics import counter, gauge
+from app.utils.text import normalize_text
+
+lookups = counter("voice_tts_cache_lookups_total", "TTS cache lookups by result", ["result"])
+
+def cache_key(text: str, language: str, speaker: str, model: str, codec: str, sample_rate: int | None, container: str) -> str:
+    """
+    Content address of a synthesized clip. `container` is "wav" for complete
+    WAV files or "raw" for headerless streamed samples, which must never be
+    served in place of each other.
+    """
+    material = "\x1f".join([normalize_text(text), language, speaker, model, codec, str(sample_rate or ""), container])
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+class TTSCache:
+    """
+    Two-tier cache of synthesized audio.
+
+    A byte-bounded in-memory LRU sits in front of a directory of files (local
+    disk, or /tmp on Lambda). Concurrent misses for the same key are
+    de-duplicated: the first caller synthesizes, the rest wait for its result.
+    """
+
+    def __init__(self, memory_bytes: int = TTS_CACHE_MEMORY_BYTES, directory: str | None = TTS_CACHE_DIR, disk_bytes: int = TTS_CACHE_DISK_BYTES):
+        self.memory_bytes = memory_bytes
+        self.directory = directory
+        self.disk_bytes = disk_bytes
+        self._memory = OrderedDict()
+        self._resident = 0
+        self._inflight = {}
+        self._disk_writes = 0
+
+    # --- memory tier ---
+
+    def _memory_get(self, key: str) -> bytes | None:
+        audio = self._memory.get(key)
+        if audio is not None:
+            self._memory.move_to_end(key)
+        return audio
+
+    def _memory_put(self, key: str, audio: bytes):
+        if len(audio) > self.memory_bytes:
+            return
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._resident -= len(old)
+        self._memory[key] = audio
+        self._resident += len(audio)
+        while self._resident > self.memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._resident -= len(evicted)
+
+    # --- disk tier ---
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key)
+
+    def _disk_read(self, key: str) -> bytes | None:
+        try:
+            with open(self._path(key), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def _disk_write(self, key: str, audio: bytes):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(audio)
+        os.replace(tmp_path, path)
+        self._disk_writes += 1
+        if self._disk_writes % 100 == 0:
+            self._disk_prune()
+
+    def _disk_prune(self):
+        # Drop least recently written files until the directory fits the budget
+        files = []
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                path = os.path.join(root, name)
+                stat = os.stat(path)
+                files.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.disk_bytes:
+                break
+            os.remove(path)
+            total -= size
+
+    # --- public API ---
+
+    @property
+    def resident_bytes(self) -> int:
+        return self._resident
+
+    async def get(self, key: str) -> bytes | None:
+        audio = self._memory_get(key)
+        if audio is not None:
+            lookups.labels(result="memory_hit").inc()
+            return audio
+        if self.directory:
+            try:
+                audio = await asyncio.to_thread(self._disk_read, key)
+            except OSError as e:
+                print(f"TTS cache disk read failed: {e!r}")
+                audio = None
+            if audio is not None:
+                lookups.labels(result="disk_hit").inc()
+                self._memory_put(key, audio)
+                return audio
+        return None
+
+    async def put(self, key: str, audio: bytes):
+        self._memory_put(key, audio)
+        if self.directory:
+            try:
+                await asyncio.to_thread(self._disk_write, key, audio)
+            except OSError as e:
+                print(f"TTS cache disk write failed: {e!r}")
+
+    async def get_or_create(self, key: str, create) -> bytes:
+        """
+        Returns the cached audio for `key`, or awaits `create()` to make it.
+        Concurrent callers for the same key share one `create()` call.
+        """
+        audio = await self.get(key)
+        if audio is not None:
+            return audio
+        pending = self._inflight.get(key)
+        if pending is not None:
+            lookups.labels(result="coalesced").inc()
+            return await asyncio.shield(pending)
+
+        lookups.labels(result="miss").inc()
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            audio = await create()
+            await self.put(key, audio)
+            future.set_result(audio)
+            return audio
+        except BaseException as e:
+            future.set_exception(e if isinstance(e, Exception) else RuntimeError("TTS synthesis cancelled"))
+            future.exception() # Mark retrieved; waiters still see it
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    async def stream(self, key: str, produce):
+        """
+        Streaming variant of get_or_create(). On a hit (or when another caller
+        is already synthesizing the key) the whole clip is yielded at once;
+        on a miss the chunks from `produce()` are passed through as they
+        arrive and the joined clip is cached at the end.
+        """
+        audio = await self.get(key)
+        if audio is not None:
+            yield audio
+            return
+        pending = self._inflight.get(key)
+        if pending is not None:
+            lookups.labels(result="coalesced").inc()
+            yield await asyncio.shield(pending)
+            return
+
+        lookups.labels(result="miss").inc()
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        parts = []
+        try:
+            async for chunk in produce():
+                parts.append(chunk)
+                yield chunk
+            audio = b"".join(parts)
+            await self.put(key, audio)
+            future.set_result(audio)
+        except BaseException as e:
+            future.set_exception(e if isinstance(e, Exception) else RuntimeError("TTS synthesis abandoned"))
+            future.exception() # Mark retrieved; waiters still see it
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+tts_cache = TTSCache() if TTS_CACHE_ENABLED else None
+
+if tts_cache:
+    gauge("voice_tts_cache_memory_bytes", "Bytes of synthesized audio held in the TTS memory cache", fn=lambda: tts_cache.resident_bytes)
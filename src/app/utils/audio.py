@@ -1,5 +1,14 @@
 import base64
 import io
+import wave
+from array import array
+from functools import lru_cache
+from typing import TYPE_CHECKING
+
+# numpy is only imported by the VAD / pause-split helpers that use it, so it
+# stays off the cold-start import path
+if TYPE_CHECKING:
+    import numpy as np
 
 def encode_audio_base64(audio_bytes: bytes) -> str:
     """Encodes audio bytes to a base64 string."""
@@ -20,3 +29,255 @@ def get_content_type(format: str) -> str:
         return 'audio/pcm' # Note: PCM usually needs container like WAV
     else:
         return 'application/octet-stream'
+
+# --- Telephony (G.711 μ-law / PCM) helpers ---
+
+MULAW_BIAS = 0x84
+MULAW_CLIP = 32635
+
+def _mulaw_decode_sample(value: int) -> int:
+    value = ~value & 0xFF
+    sign = value & 0x80
+    exponent = (value >> 4) & 0x07
+    mantissa = value & 0x0F
+    sample = (((mantissa << 3) + MULAW_BIAS) << exponent) - MULAW_BIAS
+    return -sample if sign else sample
+
+def _mulaw_encode_sample(sample: int) -> int:
+    sign = 0x80 if sample < 0 else 0
+    sample = min(abs(sample), MULAW_CLIP) + MULAW_BIAS
+    exponent = 7
+    mask = 0x4000
+    while exponent > 0 and not (sample & mask):
+        exponent -= 1
+        mask >>= 1
+    mantissa = (sample >> (exponent + 3)) & 0x0F
+    return ~(sign | (exponent << 4) | mantissa) & 0xFF
+
+_MULAW_DECODE_TABLE = [_mulaw_decode_sample(i) for i in range(256)]
+
+@lru_cache(maxsize=1)
+def _mulaw_encode_table() -> bytes:
+    # Indexed by the unsigned 16-bit representation of the sample
+    return bytes(_mulaw_encode_sample(i - 0x10000 if i & 0x8000 else i) for i in range(0x10000))
+
+def mulaw_to_pcm16(mulaw_bytes: bytes) -> bytes:
+    """Decodes 8-bit μ-law audio to 16-bit little-endian PCM."""
+    return array('h', [_MULAW_DECODE_TABLE[b] for b in mulaw_bytes]).tobytes()
+
+def pcm16_to_mulaw(pcm_bytes: bytes) -> bytes:
+    """Encodes 16-bit little-endian PCM to 8-bit μ-law."""
+    samples = array('h')
+    samples.frombytes(pcm_bytes[:len(pcm_bytes) - len(pcm_bytes) % 2])
+    table = _mulaw_encode_table()
+    return bytes(table[s & 0xFFFF] for s in samples)
+
+def pcm16_to_wav(pcm_bytes: bytes, sample_rate: int, channels: int = 1) -> bytes:
+    """Wraps raw 16-bit PCM in a WAV container."""
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav_file:
+        wav_file.setnchannels(channels)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(pcm_bytes)
+    return buffer.getvalue()
+
+def resample_pcm16(pcm_bytes: bytes, src_rate: int, dst_rate: int) -> bytes:
+    """Resamples mono 16-bit PCM with linear interpolation."""
+    if src_rate == dst_rate:
+        return pcm_bytes
+    samples = array('h')
+    samples.frombytes(pcm_bytes[:len(pcm_bytes) - len(pcm_bytes) % 2])
+    if not samples:
+        return b''
+    count = int(len(samples) * dst_rate / src_rate)
+    step = src_rate / dst_rate
+    last = len(samples) - 1
+    out = array('h', bytes(2 * count))
+    for i in range(count):
+        pos = i * step
+        j = int(pos)
+        frac = pos - j
+        nxt = samples[j + 1] if j < last else samples[last]
+        out[i] = int(samples[j] + (nxt - samples[j]) * frac)
+    return out.tobytes()
+
+# Phone network audio: G.711 μ-law at 8 kHz
+TELEPHONY_SAMPLE_RATE = 8000
+
+# WAV format tags and bits per sample
+_WAV_FORMATS = {"linear16": (1, 16), "mulaw": (7, 8)}
+
+def wav_header(sample_rate: int, data_size: int, channels: int = 1, codec: str = "linear16") -> bytes:
+    """Builds a WAV header for `data_size` bytes of 16-bit PCM or 8-bit μ-law."""
+    format_tag, bits = _WAV_FORMATS[codec]
+    block_align = channels * bits // 8
+    # Non-PCM formats carry a (zero) cbSize field
+    fmt_size = 16 if format_tag == 1 else 18
+    header = (
+        b'fmt ' + fmt_size.to_bytes(4, 'little')
+        + format_tag.to_bytes(2, 'little')
+        + channels.to_bytes(2, 'little')
+        + sample_rate.to_bytes(4, 'little')
+        + (sample_rate * block_align).to_bytes(4, 'little')  # byte rate
+        + block_align.to_bytes(2, 'little')
+        + bits.to_bytes(2, 'little')
+        + (b'\x00\x00' if fmt_size == 18 else b'')
+        + b'data' + data_size.to_bytes(4, 'little')
+    )
+    riff_size = min(4 + len(header) + data_size, 0xFFFFFFFF)
+    return b'RIFF' + riff_size.to_bytes(4, 'little') + b'WAVE' + header
+
+def wav_stream_header(sample_rate: int, channels: int = 1, codec: str = "linear16") -> bytes:
+    """
+    Builds a WAV header for a stream of unknown length.
+    The RIFF and data sizes are set to the maximum so players keep reading
+    until the connection closes.
+    """
+    return wav_header(sample_rate, 0xFFFFFFFF - 36, channels, codec)
+
+def mulaw_to_wav(mulaw_bytes: bytes, sample_rate: int = TELEPHONY_SAMPLE_RATE) -> bytes:
+    """Wraps raw μ-law samples in a WAV container."""
+    return wav_header(sample_rate, len(mulaw_bytes), codec="mulaw") + mulaw_bytes
+
+def wav_to_mulaw_wav(wav_bytes: bytes) -> bytes:
+    """Transcodes a 16-bit PCM WAV to an 8 kHz μ-law WAV, ready for the phone network."""
+    pcm, sample_rate = wav_to_pcm16(wav_bytes)
+    return mulaw_to_wav(pcm16_to_mulaw(resample_pcm16(pcm, sample_rate, TELEPHONY_SAMPLE_RATE)))
+
+def wav_codec(data: bytes) -> str | None:
+    """Returns "linear16" or "mulaw" for a WAV, or None if it isn't a WAV we know."""
+    if not data.startswith(b'RIFF') or data[12:16] != b'fmt ':
+        return None
+    format_tag = int.from_bytes(data[20:22], 'little')
+    for codec, (tag, _) in _WAV_FORMATS.items():
+        if tag == format_tag:
+            return codec
+    return None
+
+def wav_to_pcm16(wav_bytes: bytes) -> tuple[bytes, int]:
+    """Extracts raw PCM frames and the sample rate from a 16-bit WAV file."""
+    with wave.open(io.BytesIO(wav_bytes), 'rb') as wav_file:
+        if wav_file.getsampwidth() != 2:
+            raise ValueError(f"Expected 16-bit PCM WAV, got {wav_file.getsampwidth() * 8}-bit")
+        return wav_file.readframes(wav_file.getnframes()), wav_file.getframerate()
+
+def strip_wav_header(data: bytes) -> bytes:
+    """Returns the sample data of a WAV chunk, or the input unchanged if it has no RIFF header."""
+    if not data.startswith(b'RIFF'):
+        return data
+    offset = 12
+    while offset + 8 <= len(data):
+        chunk_id = data[offset:offset + 4]
+        chunk_size = int.from_bytes(data[offset + 4:offset + 8], 'little')
+        if chunk_id == b'data':
+            return data[offset + 8:]
+        offset += 8 + chunk_size + (chunk_size & 1)
+    return b''
+
+# Voice activity detection on 20 ms frames: a frame is speech when it is loud
+# relative to the clip's noise floor and not broadband noise (hiss has a
+# zero-crossing rate near 0.5)
+VAD_FRAME_MS = 20
+VAD_MARGIN_DB = 10.0
+VAD_MIN_THRESHOLD_DB = -55.0
+VAD_MAX_THRESHOLD_DB = -35.0
+VAD_MAX_ZCR = 0.4
+
+def vad_frames(pcm_bytes: bytes, sample_rate: int, frame_ms: int = VAD_FRAME_MS) -> "np.ndarray":
+    """Returns a boolean speech flag per frame of mono 16-bit PCM."""
+    import numpy as np
+
+    samples = np.frombuffer(pcm_bytes[:len(pcm_bytes) - len(pcm_bytes) % 2], dtype='<i2')
+    frame_len = max(sample_rate * frame_ms // 1000, 1)
+    count = len(samples) // frame_len
+    if count == 0:
+        return np.zeros(0, dtype=bool)
+    frames = samples[:count * frame_len].reshape(count, frame_len).astype(np.float32) / 32768.0
+
+    energy_db = frame_energy_db(pcm_bytes, sample_rate, frame_ms)
+    signs = np.signbit(frames)
+    zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / (frame_len - 1 or 1)
+
+    # Noise floor from the quietest frames; loud frames always count, so a
+    # clip that is speech throughout isn't measured against itself
+    floor = np.percentile(energy_db, 10)
+    threshold = min(max(floor + VAD_MARGIN_DB, VAD_MIN_THRESHOLD_DB), VAD_MAX_THRESHOLD_DB)
+    return (energy_db > threshold) & (zcr < VAD_MAX_ZCR)
+
+def frame_energy_db(pcm_bytes: bytes, sample_rate: int, frame_ms: int = VAD_FRAME_MS) -> "np.ndarray":
+    """Returns the energy (dBFS) of each frame of mono 16-bit PCM."""
+    import numpy as np
+
+    samples = np.frombuffer(pcm_bytes[:len(pcm_bytes) - len(pcm_bytes) % 2], dtype='<i2')
+    frame_len = max(sample_rate * frame_ms // 1000, 1)
+    count = len(samples) // frame_len
+    frames = samples[:count * frame_len].reshape(count, frame_len).astype(np.float32) / 32768.0
+    return 10 * np.log10(np.mean(frames ** 2, axis=1) + 1e-10)
+
+def split_at_pauses(
+    pcm_bytes: bytes,
+    sample_rate: int,
+    max_seconds: float,
+    overlap_seconds: float = 0.5,
+    search_seconds: float = 5.0,
+) -> list[tuple[int, int]]:
+    """
+    Splits mono 16-bit PCM into segments of at most `max_seconds`, returned as
+    (start, end) byte offsets. Each cut is placed at the quietest frame in the
+    last `search_seconds` of the segment, and the next segment starts
+    `overlap_seconds` before the cut so a word caught at the seam is heard
+    whole at least once.
+    """
+    import numpy as np
+
+    frame_bytes = sample_rate * VAD_FRAME_MS // 1000 * 2
+    max_frames = int(max_seconds * 1000 / VAD_FRAME_MS)
+    search_frames = min(int(search_seconds * 1000 / VAD_FRAME_MS), max_frames // 2)
+    overlap_frames = int(overlap_seconds * 1000 / VAD_FRAME_MS)
+    energy = frame_energy_db(pcm_bytes, sample_rate)
+
+    segments = []
+    start = 0
+    while len(energy) - start > max_frames:
+        window_start = start + max_frames - search_frames
+        cut = window_start + int(np.argmin(energy[window_start:start + max_frames]))
+        segments.append((start * frame_bytes, cut * frame_bytes))
+        start = max(cut - overlap_frames, start + 1)
+    segments.append((start * frame_bytes, len(pcm_bytes)))
+    return segments
+
+def speech_bounds(
+    pcm_bytes: bytes,
+    sample_rate: int,
+    min_speech_ms: int = 200,
+    padding_ms: int = 250,
+) -> tuple[int, int] | None:
+    """
+    Returns the (start, end) byte offsets of the speech in mono 16-bit PCM,
+    padded by `padding_ms` so soft onsets and trailing consonants survive,
+    or None if the clip has less than `min_speech_ms` of speech.
+    """
+    import numpy as np
+
+    speech = vad_frames(pcm_bytes, sample_rate)
+    if np.count_nonzero(speech) * VAD_FRAME_MS < min_speech_ms:
+        return None
+    voiced = np.flatnonzero(speech)
+    frame_bytes = sample_rate * VAD_FRAME_MS // 1000 * 2
+    padding = sample_rate * padding_ms // 1000 * 2
+    start = max(int(voiced[0]) * frame_bytes - padding, 0)
+    end = min((int(voiced[-1]) + 1) * frame_bytes + padding, len(pcm_bytes))
+    return start, end
+
+def trim_silence(wav_bytes: bytes, min_speech_ms: int = 200) -> bytes | None:
+    """
+    Trims leading and trailing silence from a 16-bit mono WAV.
+    Returns the trimmed WAV, or None if it contains no speech.
+    """
+    pcm, sample_rate = wav_to_pcm16(wav_bytes)
+    bounds = speech_bounds(pcm, sample_rate, min_speech_ms)
+    if bounds is None:
+        return None
+    start, end = bounds
+    return pcm16_to_wav(pcm[start:end], sample_rate)
@@ -0,0 +1,201 @@
+# Minimal in-process metrics, rendered in the Prometheus text format by /metrics
+
+_registry = []
+
+class Gauge:
+    """
+    A value that goes up and down, optionally split by labels. If `fn` is
+    given (unlabelled gauges only) the value is read from it at collection
+    time instead of being set explicitly.
+    """
+
+    def __init__(self, name: str, documentation: str, fn=None, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._fn = fn
+        self._values = {}
+
+    def labels(self, **labels) -> "_BoundGauge":
+        return _BoundGauge(self, tuple(str(labels[name]) for name in self.labelnames))
+
+    def set(self, value: float):
+        self._values[()] = float(value)
+
+    def inc(self, amount: float = 1):
+        self._inc((), amount)
+
+    def dec(self, amount: float = 1):
+        self._inc((), -amount)
+
+    def _inc(self, key: tuple, amount: float):
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        if self._fn:
+            return float(self._fn())
+        return self._values.get(tuple(str(labels[name]) for name in self.labelnames), 0.0)
+
+    def items(self) -> list:
+        """
+        (label values, value) pairs for every label set seen so far.
+        """
+        return sorted(self._values.items())
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge"]
+        if self._fn or not self.labelnames:
+            lines.append(f"{self.name} {self.value()}")
+        else:
+            for key, value in self.items():
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return "\n".join(lines) + "\n"
+
+class _BoundGauge:
+    def __init__(self, gauge: Gauge, key: tuple):
+        self._gauge = gauge
+        self._key = key
+
+    def inc(self, amount: float = 1):
+        self._gauge._inc(self._key, amount)
+
+    def dec(self, amount: float = 1):
+        self._gauge._inc(self._key, -amount)
+
+class Counter:
+    """
+    A monotonically increasing count, optionally split by labels:
+
+        hits = counter("cache_hits_total", "Cache hits", ["tier"])
+        hits.labels(tier="memory").inc()
+    """
+
+    def __init__(self, name: str, documentation: str, labelnames=(), fn=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._fn = fn
+        self._values = {}
+
+    def labels(self, **labels) -> "_BoundCounter":
+        return _BoundCounter(self, tuple(str(labels[name]) for name in self.labelnames))
+
+    def inc(self, amount: float = 1):
+        self._inc((), amount)
+
+    def _inc(self, key: tuple, amount: float):
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(tuple(str(labels[name]) for name in self.labelnames), 0.0)
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        values = {(): float(self._fn())} if self._fn else self._values
+        for key, value in sorted(values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return "\n".join(lines) + "\n"
+
+class _BoundCounter:
+    def __init__(self, counter: Counter, key: tuple):
+        self._counter = counter
+        self._key = key
+
+    def inc(self, amount: float = 1):
+        self._counter._inc(self._key, amount)
+
+# Latency buckets (seconds) spanning a cache hit to a slow vendor call
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+class Histogram:
+    """
+    Observations counted into cumulative buckets, optionally split by labels:
+
+        latency = histogram("stage_seconds", "Stage latency", ["stage"])
+        latency.labels(stage="stt").observe(0.42)
+    """
+
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (+Inf last), sum, count]
+        self._values = {}
+
+    def labels(self, **labels) -> "_BoundHistogram":
+        return _BoundHistogram(self, tuple(str(labels[name]) for name in self.labelnames))
+
+    def observe(self, value: float):
+        self._observe((), value)
+
+    def _observe(self, key: tuple, value: float):
+        series = self._values.get(key)
+        if series is None:
+            series = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        index = next((i for i, bound in enumerate(self.buckets) if value <= bound), len(self.buckets))
+        series[0][index] += 1
+        series[1] += value
+        series[2] += 1
+
+    def count(self, **labels) -> int:
+        series = self._values.get(tuple(str(labels[name]) for name in self.labelnames))
+        return series[2] if series else 0
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        names = self.labelnames + ("le",)
+        for key, (counts, total, count) in sorted(self._values.items()):
+            cumulative = 0
+            for bound, bucket in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket
+                le = "+Inf" if bound == float("inf") else repr(float(bound))
+                lines.append(f"{self.name}_bucket{_format_labels(names, key + (le,))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return "\n".join(lines) + "\n"
+
+class _BoundHistogram:
+    def __init__(self, histogram: Histogram, key: tuple):
+        self._histogram = histogram
+        self._key = key
+
+    def observe(self, value: float):
+        self._histogram._observe(self._key, value)
+
+def _format_labels(names: tuple, values: tuple) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{value}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+def counter(name: str, documentation: str, labelnames=(), fn=None) -> Counter:
+    """
+    Creates and registers a counter. If `fn` is given (unlabelled counters
+    only) the value is read from it at collection time.
+    """
+    metric = Counter(name, documentation, labelnames, fn)
+    _registry.append(metric)
+    return metric
+
+def gauge(name: str, documentation: str, fn=None, labelnames=()) -> Gauge:
+    """
+    Creates and registers a gauge.
+    """
+    metric = Gauge(name, documentation, fn, labelnames)
+    _registry.append(metric)
+    return metric
+
+def histogram(name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+    """
+    Creates and registers a histogram.
+    """
+    metric = Histogram(name, documentation, labelnames, buckets)
+    _registry.append(metric)
+    return metric
+
+def render_prometheus() -> str:
+    """
+    Renders every registered metric in the Prometheus text exposition format.
+    """
+    return "".join(metric.render() for metric in _registry)
@@ -0,0 +1,51 @@
+import re
+import unicodedata
+
+# Sentence terminators: Latin punctuation plus the Devanagari danda
+SENTENCE_END = re.compile(r'([.!?।॥]+)(["\')\]]*)(\s+)|\n+')
+
+# Fragments shorter than this are merged into the next sentence so that
+# abbreviations ("Dr.", "No.") and tiny clauses don't become separate TTS calls
+MIN_SENTENCE_CHARS = 20
+
+def split_sentences(buffer: str, min_chars: int = MIN_SENTENCE_CHARS) -> tuple[list[str], str]:
+    """
+    Splits streamed text into complete sentences.
+    Returns (sentences, remainder) where remainder is the unfinished tail
+    that should be prepended to the next chunk.
+    """
+    sentences = []
+    start = 0
+    for match in SENTENCE_END.finditer(buffer):
+        candidate = buffer[start:match.end()].strip()
+        if len(candidate) < min_chars:
+            continue
+        sentences.append(candidate)
+        start = match.end()
+    return sentences, buffer[start:]
+
+def normalize_text(text: str) -> str:
+    """
+    Canonical form of text used as a cache key: NFC, trimmed, whitespace collapsed.
+    """
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFC", text)).strip()
+
+def _word_key(word: str) -> str:
+    return re.sub(r"[^\w]", "", word.casefold())
+
+def merge_transcripts(parts: list[str], max_overlap_words: int = 8) -> str:
+    """
+    Joins transcripts of consecutive, overlapping audio segments. Words heard
+    twice at a seam (the longest run ending one part and starting the next,
+    ignoring case and punctuation) are kept once.
+    """
+    merged = []
+    for part in parts:
+        words = part.split()
+        longest = min(len(merged), len(words), max_overlap_words)
+        for size in range(longest, 0, -1):
+            if [_word_key(w) for w in merged[-size:]] == [_word_key(w) for w in words[:size]]:
+                words = words[size:]
+                break
+        merged.extend(words)
+    return " ".join(merged)
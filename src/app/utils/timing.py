@@ -0,0 +1,160 @@
+# Per-stage latency of the call pipeline, by stage, language and outcome
+import functools
+import inspect
+import json
+import time
+
+from app.config import METRICS_EMF, METRICS_NAMESPACE
+from app.utils.metrics import gauge, histogram
+
+stage_seconds = histogram(
+    "voice_stage_seconds", "Latency of each call pipeline stage", ["stage", "language", "outcome"],
+)
+stages_in_flight = gauge("voice_stages_in_flight", "Pipeline stages currently running", labelnames=["stage"])
+
+# Observations not yet printed as EMF: (stage, language, outcome) -> [ms, ...]
+_pending_emf = {}
+# CloudWatch takes at most 100 values per metric in one EMF record
+EMF_MAX_VALUES = 100
+
+# Exceptions that end a stage without it failing (a generator closed early
+# by its consumer, a task cancelled on hang-up)
+_EXIT_OUTCOMES = {"CancelledError": "cancelled", "GeneratorExit": "closed"}
+
+class Stage:
+    """
+    Times a block as one pipeline stage:
+
+        with Stage("vad") as span:
+            ...
+            span.outcome = "no_speech"
+
+    The outcome defaults to "ok", or "error" / "cancelled" / "closed" if the
+    block raises.
+    `language` may also be set on the span once it is known.
+    """
+
+    def __init__(self, name: str, language: str | None = None):
+        self.name = name
+        self.language = language
+        self.outcome = "ok"
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        stages_in_flight.labels(stage=self.name).inc()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        stages_in_flight.labels(stage=self.name).dec()
+        if exc_type is not None:
+            self.outcome = _EXIT_OUTCOMES.get(exc_type.__name__, "error")
+        observe(self.name, time.perf_counter() - self._started, self.language, self.outcome)
+        return False
+
+def observe(name: str, seconds: float, language: str | None = None, outcome: str = "ok"):
+    """
+    Records one stage duration.
+    """
+    language = language or "unknown"
+    stage_seconds.labels(stage=name, language=language, outcome=outcome).observe(seconds)
+    if METRICS_EMF:
+        _pending_emf.setdefault((name, language, outcome), []).append(round(seconds * 1000, 2))
+
+def timed(name: str, language=None, outcome=None):
+    """
+    Decorates an async function (or async generator) as a pipeline stage.
+
+    `language` names the argument holding the language code, or is a callable
+    taking the result. `outcome` maps the result to an outcome label. For
+    async generators the result is the last item yielded, and the time to the
+    first item is also recorded as "<name>_first".
+    """
+
+    def labels(span, result):
+        if callable(language):
+            span.language = language(result)
+        if outcome:
+            span.outcome = outcome(result)
+
+    def decorate(fn):
+        signature = inspect.signature(fn)
+
+        def start(args, kwargs) -> Stage:
+            lang = None
+            if isinstance(language, str):
+                bound = signature.bind(*args, **kwargs)
+                bound.apply_defaults()
+                lang = bound.arguments.get(language)
+            return Stage(name, lang)
+
+        if inspect.isasyncgenfunction(fn):
+            @functools.wraps(fn)
+            async def wrapper(*args, **kwargs):
+                with start(args, kwargs) as span:
+                    last = None
+                    first = True
+                    async for item in fn(*args, **kwargs):
+                        if first:
+                            first = False
+                            observe(f"{name}_first", time.perf_counter() - span._started, span.language)
+                        last = item
+                        yield item
+                    labels(span, last)
+            return wrapper
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            with start(args, kwargs) as span:
+                result = await fn(*args, **kwargs)
+                labels(span, result)
+                return result
+        return wrapper
+
+    return decorate
+
+def flush_emf():
+    """
+    Prints the stage latencies observed since the last flush as CloudWatch
+    Embedded Metric Format records, plus current in-flight counts. Lambda
+    ships stdout to CloudWatch Logs, which turns these into metrics.
+    """
+    if not METRICS_EMF or not _pending_emf:
+        return
+    timestamp = int(time.time() * 1000)
+    pending = dict(_pending_emf)
+    _pending_emf.clear()
+
+    for (name, language, outcome), values in pending.items():
+        for start in range(0, len(values), EMF_MAX_VALUES):
+            print(json.dumps({
+                "_aws": {
+                    "Timestamp": timestamp,
+                    "CloudWatchMetrics": [{
+                        "Namespace": METRICS_NAMESPACE,
+                        "Dimensions": [["stage", "language", "outcome"], ["stage"]],
+                        "Metrics": [{"Name": "StageLatency", "Unit": "Milliseconds"}],
+                    }],
+                },
+                "stage": name,
+                "language": language,
+                "outcome": outcome,
+                "StageLatency": values[start:start + EMF_MAX_VALUES],
+            }))
+
+    # In-flight counts for the stages seen since the last flush or still running
+    observed = {name for name, _, _ in pending}
+    for (name,), running in stages_in_flight.items():
+        if name not in observed and not running:
+            continue
+        print(json.dumps({
+            "_aws": {
+                "Timestamp": timestamp,
+                "CloudWatchMetrics": [{
+                    "Namespace": METRICS_NAMESPACE,
+                    "Dimensions": [["stage"]],
+                    "Metrics": [{"Name": "StagesInFlight", "Unit": "Count"}],
+                }],
+            },
+            "stage": name,
+            "StagesInFlight": running,
+        }))